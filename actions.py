@@ -32,6 +32,14 @@ class Action:
         """
         raise NotImplementedError()
 
+    def record(self) -> None:
+        """
+        Append this action to the engine's journal, if one is being kept.
+        """
+        journal = self.engine.journal
+        if journal is not None:
+            journal.record(self)
+
 
 class EscapeAction(Action):
     def perform(self) -> None:
@@ -40,7 +48,44 @@ class EscapeAction(Action):
 
 class WaitAction(Action):
     def perform(self) -> None:
-        pass
+        self.record()
+
+
+class TakeStairsAction(Action):
+    """
+    Take the stairs the entity is standing on.
+
+    `direction` is 1 to go down stairs, and -1 to go up.
+    """
+    def __init__(self, entity: Actor, direction: int) -> None:
+        super().__init__(entity)
+        self.direction = direction
+
+    def perform(self) -> None:
+        self.record()
+        game_map = self.engine.game_map
+        if self.direction > 0:
+            stairs_location = game_map.downstairs_location
+        else:
+            stairs_location = game_map.upstairs_location
+
+        if (self.entity.x, self.entity.y) != stairs_location:
+            self.engine.message_log.add_message(
+                "There are no stairs here.", color.impossible
+            )
+            return
+
+        self.engine.game_world.change_floor(
+            self.engine.game_world.current_floor + self.direction
+        )
+        if self.direction > 0:
+            self.engine.message_log.add_message(
+                "You descend the staircase.", color.descend
+            )
+        else:
+            self.engine.message_log.add_message(
+                "You ascend the staircase.", color.descend
+            )
 
 
 class DirectionalAction(Action):
@@ -77,6 +122,7 @@ class DirectionalAction(Action):
 
 class MovementAction(DirectionalAction):
     def perform(self) -> None:
+        self.record()
         dest_x, dest_y = self.dest_xy
 
         if not self.engine.game_map.in_bounds(dest_x, dest_y):
@@ -93,36 +139,28 @@ class MovementAction(DirectionalAction):
 
 
 class MeleeAttack(DirectionalAction):
+    """
+    Attack the actor at the destination.
+
+    The attack is queued, and resolved with the other attacks of this phase of the
+    turn by the engine's `CombatResolver`.
+    """
     def perform(self) -> None:
+        self.record()
         target = self.target_actor
         if not target:
             # No entity to attack
             return
 
-        damage = self.entity.fighter.power - target.fighter.defense
-
-        attack_desc = f"{self.entity.name.capitalize()} attacks {target.name}"
-
-        if self.entity is self.engine.player:
-            attack_color = color.player_atk
-        else:
-            attack_color = color.enemy_atk
-
-        if damage > 0:
-            target.fighter.hp -= damage
-            self.engine.message_log.add_message(
-                f"{attack_desc} for {damage} hit points!", attack_color
-            )
-        else:
-            self.engine.message_log.add_message(
-                f"{attack_desc} but does no damage.", attack_color
-            )
+        self.engine.combat.add(self.entity, target)
 
 
 class BumpAction(DirectionalAction):
     """
     Bump applies a movement or an attack, depending on which is appropriate to the
     tile being targeted.
+
+    A bump is journaled as the movement or attack it resolves to.
     """
     def perform(self) -> None:
         if self.target_actor:
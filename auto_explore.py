@@ -0,0 +1,154 @@
+"""
+Run and auto-explore: moving the player for many turns on a single command.
+
+Turns are taken back to back, without rendering in between, until something
+interesting happens: a monster comes into view, a message is logged, the way is
+blocked, or there is nowhere left to go.
+"""
+from __future__ import annotations
+
+from typing import Callable, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+import tcod
+
+from actions import MovementAction
+import color
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+# How far from the player auto-explore looks for unexplored tiles.
+EXPLORE_RADIUS = 100
+
+# Returns the next step to take, or None to stop.
+StepFunction = Callable[["Engine"], Optional[Tuple[int, int]]]
+
+
+def hostiles_in_view(engine: Engine) -> bool:
+    game_map = engine.game_map
+    return any(
+        game_map.visible[actor.x, actor.y]
+        for actor in game_map.actors
+        if actor is not engine.player
+    )
+
+
+def explore_step(engine: Engine) -> Optional[Tuple[int, int]]:
+    """
+    Return the step towards the nearest explored tile next to an unexplored one.
+
+    Distances come from a Dijkstra map over the explored, walkable tiles, so the
+    player never walks into the unknown blindly.
+    """
+    game_map = engine.game_map
+    player = engine.player
+    x1, y1 = max(0, player.x - EXPLORE_RADIUS), max(0, player.y - EXPLORE_RADIUS)
+    window = (
+        slice(x1, player.x + EXPLORE_RADIUS + 1),
+        slice(y1, player.y + EXPLORE_RADIUS + 1),
+    )
+
+    explored = game_map.explored[window]
+    walkable = game_map.tiles["walkable"][window] & explored
+
+    # A tile is on the frontier if any of its 8 neighbors is unexplored.
+    unexplored = np.pad(~explored, 1, constant_values=False)
+    near_unexplored = np.zeros_like(explored)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            near_unexplored |= unexplored[
+                1 + dx : unexplored.shape[0] - 1 + dx,
+                1 + dy : unexplored.shape[1] - 1 + dy,
+            ]
+    frontier = walkable & near_unexplored
+    if not frontier.any():
+        return None
+
+    distance = tcod.path.maxarray(walkable.shape, dtype=np.int32)
+    distance[frontier] = 0
+    tcod.path.dijkstra2d(distance, walkable.astype(np.int8), 2, 3, out=distance)
+
+    path = tcod.path.hillclimb2d(distance, (player.x - x1, player.y - y1), True, True)
+    if len(path) < 2:
+        return None
+    next_x, next_y = path[1].tolist()
+    return next_x + x1 - player.x, next_y + y1 - player.y
+
+
+def run_step(dx: int, dy: int) -> StepFunction:
+    """
+    Return a step function which keeps going in one direction.
+
+    Running stops at junctions, when the walkable tiles around the player change
+    from those around the previous position, and on stairs.
+    """
+    previous_openings: Optional[int] = None
+
+    def step(engine: Engine) -> Optional[Tuple[int, int]]:
+        nonlocal previous_openings
+        game_map = engine.game_map
+        x, y = engine.player.x, engine.player.y
+        if (x, y) in (game_map.downstairs_location, game_map.upstairs_location):
+            if previous_openings is not None:
+                return None
+
+        openings = int(
+            game_map.tiles["walkable"][
+                max(0, x - 1) : x + 2, max(0, y - 1) : y + 2
+            ].sum()
+        )
+        if previous_openings is not None and openings != previous_openings:
+            return None
+        previous_openings = openings
+        return dx, dy
+
+    return step
+
+
+def auto_move(engine: Engine, next_step: StepFunction, max_turns: int = 1000) -> int:
+    """
+    Take turns moving the player until something interesting happens.
+
+    Return the number of turns taken.
+    """
+    if hostiles_in_view(engine):
+        engine.message_log.add_message("Not with enemies in view!", color.impossible)
+        return 0
+
+    player = engine.player
+    messages = engine.message_log.messages
+    for turn in range(max_turns):
+        step = next_step(engine)
+        if step is None:
+            return turn
+
+        game_map = engine.game_map
+        dest_x, dest_y = player.x + step[0], player.y + step[1]
+        if (
+            not game_map.in_bounds(dest_x, dest_y)
+            or not game_map.tiles["walkable"][dest_x, dest_y]
+            or game_map.get_blocking_entity_at_location(dest_x, dest_y)
+        ):
+            # Blocked, stop without wasting a turn.
+            return turn
+
+        log_state = (len(messages), messages[-1].count if messages else 0)
+        engine.take_turn(MovementAction(player, *step))
+
+        if (len(messages), messages[-1].count if messages else 0) != log_state:
+            return turn + 1
+        if hostiles_in_view(engine):
+            return turn + 1
+
+    return max_turns
+
+
+def auto_explore(engine: Engine) -> int:
+    """
+    Explore until something interesting happens or there is nothing left to explore.
+    """
+    turns = auto_move(engine, explore_step)
+    if not hostiles_in_view(engine) and explore_step(engine) is None:
+        engine.message_log.add_message("Nothing left to explore.", color.impossible)
+    return turns
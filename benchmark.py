@@ -0,0 +1,215 @@
+"""
+Benchmarks for the engine's hot paths, run headless.
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json --threshold 0.1
+
+Every benchmark runs over a grid of map sizes, room counts and monster densities,
+and records its throughput (calls per second) and the peak memory traced while it
+ran.  `--compare` flags every benchmark slower than the baseline by more than the
+threshold, and exits with status 1 if there are any.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import functools
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import tcod
+
+import color
+from engine import Engine
+import entity_factories
+from main import new_game
+from message_log import MessageLog
+from path_planning import search_paths
+from procgen import generate_dungeon
+
+MAP_SIZES = [(80, 43), (250, 250), (1000, 1000)]
+ROOM_COUNTS = [30, 300]
+MONSTER_DENSITIES = [2, 6]
+MESSAGE_COUNTS = [100, 10_000]
+
+# Results of a benchmark, by name.
+Results = Dict[str, Dict[str, float]]
+
+
+def measure(function: Callable[[], object], min_time: float) -> Dict[str, float]:
+    """
+    Call `function` repeatedly for at least `min_time` seconds, then once more while
+    tracing memory, since tracing slows everything down.
+    """
+    calls = 0
+    start_time = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= min_time:
+            break
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"calls_per_sec": calls / elapsed, "peak_kib": peak / 1024}
+
+
+def engine_benchmarks(
+    width: int, height: int, rooms: int, monsters: int
+) -> Iterator[Tuple[str, Callable[[], object]]]:
+    """
+    Yield (name, function) for each benchmark running on a generated game.
+    """
+    engine = new_game(
+        seed=0,
+        map_width=width,
+        map_height=height,
+        max_rooms=rooms,
+        max_monsters_per_room=monsters,
+    )
+    # Benchmarks run for many turns, don't record them or let the player die.
+    engine.journal = None
+    engine.player.fighter.max_hp = engine.player.fighter.hp = 1_000_000
+
+    # Generating moves the player to the new map, so give it an engine of its own.
+    scratch_engine = Engine(player=copy.deepcopy(entity_factories.player))
+    yield "generate_dungeon", lambda: generate_dungeon(
+        max_rooms=rooms,
+        room_min_size=6,
+        room_max_size=10,
+        map_width=width,
+        map_height=height,
+        max_monsters_per_room=monsters,
+        engine=scratch_engine,
+    )
+
+    monsters_by_id = sorted(
+        (actor for actor in engine.game_map.actors if actor is not engine.player),
+        key=lambda actor: actor.id,
+    )
+    if monsters_by_id and monsters_by_id[0].ai:
+        ai = monsters_by_id[0].ai
+        player = engine.player
+        yield "get_path_to", lambda: ai.get_path_to(player.x, player.y)
+
+    # Every monster's path to the player, searched in the thread pool and inline.
+    ends = [
+        ((monster.x, monster.y), (engine.player.x, engine.player.y))
+        for monster in monsters_by_id
+    ]
+    if ends:
+        for name, parallel in (("pooled", True), ("inline", False)):
+            yield f"search_paths.{name}", functools.partial(
+                search_paths, engine.game_map, ends, parallel
+            )
+
+    yield "update_fov", engine.update_fov
+    yield "handle_enemy_turns", engine.handle_enemy_turns
+
+    console = tcod.console.Console(80, 50, order="F")
+    engine.camera.center_on(engine.player.x, engine.player.y, engine.game_map)
+    yield "GameMap.render", lambda: engine.game_map.render(console, engine.camera)
+
+
+def run(min_time: float, quick: bool) -> Results:
+    results: Results = {}
+
+    grid = itertools.product(MAP_SIZES, ROOM_COUNTS, MONSTER_DENSITIES)
+    if quick:
+        grid = itertools.islice(grid, 1)
+    for (width, height), rooms, monsters in grid:
+        for name, function in engine_benchmarks(width, height, rooms, monsters):
+            key = f"{name}[{width}x{height},rooms={rooms},monsters={monsters}]"
+            results[key] = measure(function, min_time)
+            print_result(key, results[key])
+
+    console = tcod.console.Console(40, 5, order="F")
+    for count in MESSAGE_COUNTS[:1] if quick else MESSAGE_COUNTS:
+        log = MessageLog()
+        for i in range(count):
+            log.add_message(f"Message {i}, long enough to need wrapping.", color.white)
+        key = f"MessageLog.render_messages[messages={count}]"
+        results[key] = measure(
+            lambda: log.render_messages(console, 0, 0, 40, 5, log.messages), min_time
+        )
+        print_result(key, results[key])
+
+    return results
+
+
+def print_result(key: str, result: Dict[str, float]) -> None:
+    print(
+        f"{key:<70}{result['calls_per_sec']:>12.1f}/s{result['peak_kib']:>12.1f} KiB"
+    )
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> List[str]:
+    """
+    Return a line for each benchmark slower than its baseline by more than `threshold`.
+    """
+    slowdowns = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        slowdown = baseline[key]["calls_per_sec"] / result["calls_per_sec"] - 1
+        if slowdown > threshold:
+            slowdowns.append(f"{key} is {slowdown:.0%} slower than the baseline.")
+    return slowdowns
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--save", metavar="PATH", help="Write the results to PATH.")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="Compare the results to the baseline at PATH."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Slowdown to flag when comparing, as a fraction (default: 0.1).",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="Seconds to run each benchmark for (default: 0.2).",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Only run the smallest configuration."
+    )
+    args = parser.parse_args()
+
+    results = run(args.min_time, args.quick)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "tcod": tcod.__version__,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        slowdowns = compare(results, baseline, args.threshold)
+        print("\n".join(slowdowns) or "No slowdowns.")
+        if slowdowns:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
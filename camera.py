@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+
+class Camera:
+    """
+    The part of the map shown on the console.
+
+    `x` and `y` are the map position of the viewport's top-left corner, the viewport
+    itself is drawn at the console's top-left corner.
+    """
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.x = 0
+        self.y = 0
+
+    def center_on(self, x: int, y: int, game_map: GameMap) -> None:
+        """
+        Center the viewport on a map position, without showing past the map's edges.
+        """
+        self.x = max(0, min(x - self.width // 2, game_map.width - self.width))
+        self.y = max(0, min(y - self.height // 2, game_map.height - self.height))
+
+    def window(self, game_map: GameMap) -> Tuple[slice, slice]:
+        """
+        Return the region of the map under the viewport as a 2D array index.
+        """
+        return (
+            slice(self.x, min(self.x + self.width, game_map.width)),
+            slice(self.y, min(self.y + self.height, game_map.height)),
+        )
+
+    def in_viewport(self, screen_x: int, screen_y: int) -> bool:
+        """
+        Return True if a console position is inside the viewport.
+        """
+        return 0 <= screen_x < self.width and 0 <= screen_y < self.height
+
+    def screen_to_map(self, screen_x: int, screen_y: int) -> Tuple[int, int]:
+        return screen_x + self.x, screen_y + self.y
+
+    def map_to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        return x - self.x, y - self.y
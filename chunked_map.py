@@ -0,0 +1,289 @@
+"""
+A GameMap split into fixed-size chunks, for worlds too large to hold in memory.
+
+Chunks are loaded on demand, the first time one of their tiles is touched, and the
+least recently used ones are written to disk once more than `max_chunks` are in
+memory.  `tiles`, `visible` and `explored` are `ChunkedArray`s, which index like the
+NumPy arrays of a regular GameMap, so the rest of the game does not need to know the
+difference as long as it only works on the region around the player.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+import os
+import re
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from game_map import GameMap
+import tile_types
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Entity
+    from fields import Field
+
+# Called as `generate(tiles, x, y)` to fill in a chunk which was never saved, where
+# `tiles` is the chunk's array and x, y the map position of its top-left corner.
+ChunkGenerator = Callable[[np.ndarray, int, int], None]
+
+Index = Tuple[Any, Any]
+
+# The file name of a chunk written to disk, see `ChunkedGameMap.chunk_path`.
+CHUNK_FILE = re.compile(r"chunk_(\d+)_(\d+)\.npz")
+
+
+class Chunk:
+    def __init__(self, size: int) -> None:
+        self.tiles = np.full((size, size), fill_value=tile_types.wall, order="F")
+        self.visible = np.full((size, size), fill_value=False, order="F")
+        self.explored = np.full((size, size), fill_value=False, order="F")
+        # True if this chunk changed since it was last written to disk.
+        self.dirty = True
+
+
+def _to_slice(index: Any, length: int) -> Tuple[slice, bool]:
+    """
+    Return an index as a slice clipped to `length`, and whether it was a scalar.
+    """
+    if isinstance(index, slice):
+        start, stop, step = index.indices(length)
+        if step != 1:
+            raise IndexError("ChunkedArray slices do not support steps.")
+        return slice(start, max(start, stop)), False
+    index = int(index)
+    if index < 0:
+        index += length
+    if not 0 <= index < length:
+        raise IndexError(f"Index {index} is out of bounds for length {length}.")
+    return slice(index, index + 1), True
+
+
+class ChunkedArray:
+    """
+    One of a ChunkedGameMap's arrays, or one field of it, indexed as if it was dense.
+
+    Integer indexes read and write single tiles, and slices copy between the chunks
+    and a dense array.  Steps and fancy indexing are not supported.
+    """
+    def __init__(
+        self, game_map: ChunkedGameMap, name: str, field: Optional[str] = None
+    ) -> None:
+        self.game_map = game_map
+        self.name = name
+        self.field = field
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.game_map.width, self.game_map.height
+
+    @property
+    def dtype(self) -> np.dtype:
+        dtype = tile_types.tile_dt if self.name == "tiles" else np.dtype(bool)
+        if self.field:
+            return dtype[self.field]
+        return dtype
+
+    def _chunk_array(self, chunk_x: int, chunk_y: int) -> np.ndarray:
+        chunk = self.game_map.get_chunk(chunk_x, chunk_y)
+        array: np.ndarray = getattr(chunk, self.name)
+        if self.field:
+            return array[self.field]
+        return array
+
+    def _regions(
+        self, key: Index
+    ) -> Iterable[Tuple[Tuple[int, int], Index, Index]]:
+        """
+        Yield (chunk, index into the chunk, index into the dense region) for each chunk
+        overlapping `key`.
+        """
+        size = self.game_map.chunk_size
+        xs, ys = key
+        for chunk_x in range(xs.start // size, (xs.stop + size - 1) // size):
+            x1 = max(xs.start, chunk_x * size)
+            x2 = min(xs.stop, (chunk_x + 1) * size)
+            for chunk_y in range(ys.start // size, (ys.stop + size - 1) // size):
+                y1 = max(ys.start, chunk_y * size)
+                y2 = min(ys.stop, (chunk_y + 1) * size)
+                yield (
+                    (chunk_x, chunk_y),
+                    (
+                        slice(x1 - chunk_x * size, x2 - chunk_x * size),
+                        slice(y1 - chunk_y * size, y2 - chunk_y * size),
+                    ),
+                    (
+                        slice(x1 - xs.start, x2 - xs.start),
+                        slice(y1 - ys.start, y2 - ys.start),
+                    ),
+                )
+
+    def _normalize(self, key: Any) -> Tuple[Index, bool]:
+        if key is Ellipsis:
+            key = slice(None)
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        x, y = key
+        xs, x_scalar = _to_slice(x, self.game_map.width)
+        ys, y_scalar = _to_slice(y, self.game_map.height)
+        return (xs, ys), x_scalar and y_scalar
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, str):
+            return ChunkedArray(self.game_map, self.name, key)
+        (xs, ys), scalar = self._normalize(key)
+        size = self.game_map.chunk_size
+        if scalar:
+            chunk_x, x = divmod(xs.start, size)
+            chunk_y, y = divmod(ys.start, size)
+            return self._chunk_array(chunk_x, chunk_y)[x, y]
+
+        region = np.empty(
+            (xs.stop - xs.start, ys.stop - ys.start), dtype=self.dtype, order="F"
+        )
+        for (chunk_x, chunk_y), chunk_index, region_index in self._regions((xs, ys)):
+            region[region_index] = self._chunk_array(chunk_x, chunk_y)[chunk_index]
+        return region
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        (xs, ys), _ = self._normalize(key)
+        value = np.broadcast_to(
+            np.asarray(value, dtype=self.dtype),
+            (xs.stop - xs.start, ys.stop - ys.start),
+        )
+        for (chunk_x, chunk_y), chunk_index, region_index in self._regions((xs, ys)):
+            self._chunk_array(chunk_x, chunk_y)[chunk_index] = value[region_index]
+            self.game_map.chunks[chunk_x, chunk_y].dirty = True
+        if self.name == "tiles":
+            self.game_map.tiles_changed()
+
+
+class ChunkedGameMap(GameMap):
+    def __init__(
+        self,
+        engine: Engine,
+        width: int,
+        height: int,
+        path: str,
+        entities: Iterable[Entity] = (),
+        *,
+        chunk_size: int = 64,
+        max_chunks: int = 256,
+        generate: Optional[ChunkGenerator] = None,
+        scent: Optional[Field] = None,
+        noise: Optional[Field] = None,
+    ) -> None:
+        """
+        `path` is the directory chunks are evicted to, and read back from.
+
+        `scent` and `noise` may be given when restoring a map.
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.generate = generate
+        # Loaded chunks, from least to most recently used.
+        self.chunks: OrderedDict[Tuple[int, int], Chunk] = OrderedDict()
+        super().__init__(
+            engine,
+            width,
+            height,
+            entities,
+            tiles=ChunkedArray(self, "tiles"),  # type: ignore
+            visible=ChunkedArray(self, "visible"),  # type: ignore
+            explored=ChunkedArray(self, "explored"),  # type: ignore
+            scent=scent,
+            noise=noise,
+        )
+        # Nothing is visible yet, and clearing the whole map would load every chunk.
+        self.fov_window = (slice(0, 0), slice(0, 0))
+        os.makedirs(path, exist_ok=True)
+
+    def chunk_path(self, chunk_x: int, chunk_y: int) -> str:
+        return os.path.join(self.path, f"chunk_{chunk_x}_{chunk_y}.npz")
+
+    def get_chunk(self, chunk_x: int, chunk_y: int) -> Chunk:
+        """
+        Return a chunk, loading or generating it if it isn't in memory.
+        """
+        chunk = self.chunks.get((chunk_x, chunk_y))
+        if chunk is not None:
+            self.chunks.move_to_end((chunk_x, chunk_y))
+            return chunk
+
+        chunk = Chunk(self.chunk_size)
+        path = self.chunk_path(chunk_x, chunk_y)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                chunk.tiles[...] = data["tiles"]
+                chunk.visible[...] = data["visible"]
+                chunk.explored[...] = data["explored"]
+            chunk.dirty = False
+        elif self.generate:
+            self.generate(
+                chunk.tiles, chunk_x * self.chunk_size, chunk_y * self.chunk_size
+            )
+            self.tiles_changed()
+
+        self.chunks[chunk_x, chunk_y] = chunk
+        while len(self.chunks) > self.max_chunks:
+            self.evict()
+        return chunk
+
+    def known_chunks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Iterate over the (tiles, explored) arrays of every chunk loaded or on disk.
+
+        Chunks on disk are read without being loaded, so no chunk is evicted.
+        """
+        for chunk in self.chunks.values():
+            yield chunk.tiles, chunk.explored
+        for name in os.listdir(self.path):
+            match = CHUNK_FILE.fullmatch(name)
+            if match is None:
+                continue
+            if (int(match[1]), int(match[2])) in self.chunks:
+                continue
+            with np.load(os.path.join(self.path, name)) as data:
+                yield data["tiles"], data["explored"]
+
+    def explored_fraction(self) -> float:
+        """
+        Return the fraction of the walkable tiles which have been explored.
+
+        Only the chunks which were ever loaded count, the rest of the map isn't
+        known yet.
+        """
+        explored = walkable_count = 0
+        for tiles, explored_chunk in self.known_chunks():
+            walkable = tiles["walkable"]
+            walkable_count += int(np.count_nonzero(walkable))
+            explored += int(np.count_nonzero(walkable & explored_chunk))
+        return explored / max(1, walkable_count)
+
+    def write_chunk(self, chunk_x: int, chunk_y: int) -> None:
+        chunk = self.chunks[chunk_x, chunk_y]
+        if chunk.dirty:
+            np.savez(
+                self.chunk_path(chunk_x, chunk_y),
+                tiles=chunk.tiles,
+                visible=chunk.visible,
+                explored=chunk.explored,
+            )
+            chunk.dirty = False
+
+    def evict(self) -> None:
+        """
+        Write the least recently used chunk to disk and drop it from memory.
+        """
+        key = next(iter(self.chunks))
+        self.write_chunk(*key)
+        del self.chunks[key]
+
+    def flush(self) -> None:
+        """
+        Write every loaded chunk which changed to disk.
+        """
+        for key in self.chunks:
+            self.write_chunk(*key)
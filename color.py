@@ -8,6 +8,8 @@ player_die = (0xFF, 0x30, 0x30)
 enemy_die = (0xFF, 0xA0, 0x30)
 
 welcome_text = (0x20, 0xA0, 0xFF)
+impossible = (0x80, 0x80, 0x80)
+descend = (0x9F, 0x3F, 0xFF)
 
 bar_text = white
 bar_filled = (0x0, 0x60, 0x0)
@@ -0,0 +1,115 @@
+"""
+Melee attacks are collected over a phase of the turn and resolved together.
+
+Damage, hit points and deaths are computed with NumPy for the whole batch, then the
+results are applied and identical attack messages are logged once, with a count.
+Every attack which lands makes noise where it lands.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+import color
+from fields import NOISE_AMOUNT
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+
+
+class CombatResolver:
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.attackers: List[Actor] = []
+        self.targets: List[Actor] = []
+
+    def add(self, attacker: Actor, target: Actor) -> None:
+        """
+        Queue an attack, to be resolved with the others by `resolve`.
+        """
+        self.attackers.append(attacker)
+        self.targets.append(target)
+
+    def resolve(self) -> None:
+        """
+        Resolve every queued attack, in the order they were made.
+
+        As when attacks were resolved one at a time, attacks on a target which an
+        earlier attack of the batch already killed do nothing.
+        """
+        if not self.attackers:
+            return
+        attackers, self.attackers = self.attackers, []
+        targets, self.targets = self.targets, []
+
+        # Each distinct target, and the index of each attack's target among them.
+        unique_targets = list({id(target): target for target in targets}.values())
+        index_by_target = {id(target): i for i, target in enumerate(unique_targets)}
+        target_index = np.array([index_by_target[id(target)] for target in targets])
+
+        power = np.array([attacker.fighter.power for attacker in attackers])
+        defense = np.array([target.fighter.defense for target in unique_targets])
+        hp = np.array([target.fighter.hp for target in unique_targets])
+
+        damage = np.maximum(power - defense[target_index], 0)
+
+        # Damage each target took from the attacks before each attack.
+        order = np.argsort(target_index, kind="stable")
+        sorted_targets = target_index[order]
+        damage_before = np.cumsum(damage[order]) - damage[order]
+        first_of_target = np.searchsorted(sorted_targets, sorted_targets)
+        damage_before -= damage_before[first_of_target]
+
+        landed = np.empty(len(attackers), dtype=bool)
+        landed[order] = damage_before < hp[sorted_targets]
+
+        total_damage = np.bincount(
+            target_index[landed], weights=damage[landed], minlength=len(unique_targets)
+        ).astype(int)
+        new_hp = np.maximum(hp - total_damage, 0)
+
+        self.log_attacks(attackers, targets, damage, landed)
+
+        # Fighting can be heard from afar.
+        landed_targets = [targets[i] for i in np.flatnonzero(landed)]
+        self.engine.game_map.noise.deposit(
+            np.array([target.x for target in landed_targets], dtype=int),
+            np.array([target.y for target in landed_targets], dtype=int),
+            NOISE_AMOUNT,
+        )
+
+        for i in np.flatnonzero(total_damage):
+            # The setter takes care of deaths.
+            unique_targets[i].fighter.hp = int(new_hp[i])
+
+    def log_attacks(
+        self,
+        attackers: List[Actor],
+        targets: List[Actor],
+        damage: np.ndarray,
+        landed: np.ndarray,
+    ) -> None:
+        """
+        Log one message per distinct attack, counting repeats.
+        """
+        messages: Dict[str, Tuple[Tuple[int, int, int], int]] = {}
+        for i in np.flatnonzero(landed):
+            attacker = attackers[i]
+            attack_desc = f"{attacker.name.capitalize()} attacks {targets[i].name}"
+            if damage[i] > 0:
+                text = f"{attack_desc} for {damage[i]} hit points!"
+            else:
+                text = f"{attack_desc} but does no damage."
+
+            if attacker is self.engine.player:
+                attack_color = color.player_atk
+            else:
+                attack_color = color.enemy_atk
+
+            _, count = messages.get(text, (attack_color, 0))
+            messages[text] = (attack_color, count + 1)
+
+        for text, (attack_color, count) in messages.items():
+            self.engine.message_log.add_message(text, attack_color, count=count)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import List, Tuple, TYPE_CHECKING
+from collections import deque
+from typing import Deque, List, Optional, Tuple, TYPE_CHECKING
 
 import numpy as np
 import tcod
@@ -10,63 +11,254 @@ from components.base_component import BaseComponent
 
 if TYPE_CHECKING:
     from entity import Actor
+    from game_map import GameMap
+
+# How far a path may first stray outside the rectangle between its two ends.
+PATH_MARGIN = 20
+# The margin is widened until a path is found, up to this.
+MAX_PATH_MARGIN = 320
+
+def path_cost(game_map: GameMap, x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
+    """
+    Return the cost of moving over each tile from (x1, y1) to (x2, y2), excluded.
+
+    Walls can't be crossed, and tiles blocked by an entity cost more, so that paths
+    go around them when they can.
+    """
+    cost = np.array(game_map.tiles["walkable"][x1:x2, y1:y2], dtype=np.int8)
+
+    for entity in game_map.blocking_candidates():
+        # Check that an entity blocks movement and the cost isn't zero
+        if (
+            entity.blocks_movement
+            and x1 <= entity.x < x2
+            and y1 <= entity.y < y2
+            and cost[entity.x - x1, entity.y - y1]
+        ):
+            cost[entity.x - x1, entity.y - y1] += 10
+    return cost
+
+
+def search_path(
+    cost: np.ndarray,
+    origin: Tuple[int, int],
+    start: Tuple[int, int],
+    dest: Tuple[int, int],
+) -> List[Tuple[int, int]]:
+    """
+    Return the path from `start` to `dest` over `cost`, excluding `start`.
+
+    `cost` covers the map from `origin` on.  Only reads `cost`, so searches can run
+    in other threads.
+    """
+    x1, y1 = origin
+    graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
+    pathfinder = tcod.path.Pathfinder(graph)
+
+    # Set the start position
+    pathfinder.add_root((start[0] - x1, start[1] - y1))
+
+    # Comput the path to the destination
+    path: List[List[int]] = pathfinder.path_to(
+        (dest[0] - x1, dest[1] - y1)
+    )[1:].tolist()
+
+    return [(index[0] + x1, index[1] + y1) for index in path]
+
+
+def path_window(
+    start: Tuple[int, int], dest: Tuple[int, int], margin: int, width: int, height: int
+) -> Tuple[int, int, int, int]:
+    """
+    Return the rectangle around both ends of a path, plus `margin`, within the map.
+    """
+    x1 = max(0, min(start[0], dest[0]) - margin)
+    y1 = max(0, min(start[1], dest[1]) - margin)
+    x2 = min(width, max(start[0], dest[0]) + margin + 1)
+    y2 = min(height, max(start[1], dest[1]) + margin + 1)
+    return x1, y1, x2, y2
+
 
 class BaseAI(Action, BaseComponent):
 
     entity: Actor
 
+    # A path computed ahead of this actor's turn, see `path_planning`.
+    planned_path: Optional[List[Tuple[int, int]]] = None
+
     def perform(self) -> None:
         raise NotImplementedError()
 
+    def path_request(self) -> Optional[Tuple[int, int]]:
+        """
+        Return the position this actor will need a fresh path to on its next turn,
+        or None if it won't need one.
+        """
+        return None
+
     def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
         """
         Compute and return a path to the target position.
 
+        Nothing is searched if the map's layout shows the target can't be reached.
+        Otherwise only the rectangle around both ends of the path is searched, plus a
+        margin of room to go around obstacles.  The margin starts at `PATH_MARGIN`
+        and is widened while no path is found, until the whole map or
+        `MAX_PATH_MARGIN` is covered.
+
         If there is no valid path, return an empty list.
         """
-        cost = np.array(self.entity.game_map.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.game_map.entities:
-            # Check that an entity blocks movement and the cost isn't zero
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                cost[entity.x, entity.y] += 10
-            
-        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-        pathfinder = tcod.path.Pathfinder(graph)
-
-        # Set the start position
-        pathfinder.add_root((self.entity.x, self.entity.y))
+        game_map = self.entity.game_map
+        if not game_map.connected((self.entity.x, self.entity.y), (dest_x, dest_y)):
+            # No search would find a path, however wide.
+            return []
+        margin = PATH_MARGIN
+        while True:
+            path = self.get_path_in_margin(dest_x, dest_y, margin)
+            covers_map = (
+                min(self.entity.x, dest_x) - margin <= 0
+                and min(self.entity.y, dest_y) - margin <= 0
+                and max(self.entity.x, dest_x) + margin >= game_map.width - 1
+                and max(self.entity.y, dest_y) + margin >= game_map.height - 1
+            )
+            if path or covers_map or margin >= MAX_PATH_MARGIN:
+                return path
+            margin *= 4
 
-        # Comput the path to the destination
-        path : List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
-
-        return [(index[0], index[1]) for index in path]
+    def get_path_in_margin(
+        self, dest_x: int, dest_y: int, margin: int
+    ) -> List[Tuple[int, int]]:
+        """
+        Compute a path which stays within `margin` tiles of the rectangle between its
+        two ends.
+        """
+        self.engine.profiler.count("path_searches")
+        game_map = self.entity.game_map
+        start = self.entity.x, self.entity.y
+        x1, y1, x2, y2 = path_window(
+            start, (dest_x, dest_y), margin, game_map.width, game_map.height
+        )
+        return search_path(
+            path_cost(game_map, x1, y1, x2, y2), (x1, y1), start, (dest_x, dest_y)
+        )
 
 
 class HostileEnemy(BaseAI):
     def __init__(self, entity: Actor) -> None:
         super().__init__(entity)
-        self.path: List[Tuple[int, int]] = []
-    
+        # The steps left to take, the position they lead to, and the map's cost
+        # version when they were searched.
+        self.path: Deque[Tuple[int, int]] = deque()
+        self.path_target: Optional[Tuple[int, int]] = None
+        self.path_version = -1
+
+    def set_path(self, path: List[Tuple[int, int]], target: Tuple[int, int]) -> None:
+        self.path = deque(path)
+        self.path_target = target
+        self.path_version = self.engine.game_map.cost_version
+
+    def update_path(self, target: Tuple[int, int]) -> bool:
+        """
+        Bring the path up to date with the target's position without searching.
+
+        If the target moved to a neighboring tile, only the end of the path changes.
+        Return False if the path can't be kept, and must be searched again.
+        """
+        path = self.path
+        if not path or self.path_version != self.engine.game_map.cost_version:
+            return False
+        if not _adjacent(path[0], (self.entity.x, self.entity.y)):
+            return False
+        if target == self.path_target:
+            return True
+        assert self.path_target is not None
+        if not _adjacent(target, self.path_target):
+            return False
+
+        if len(path) >= 2 and path[-2] == target:
+            # The target stepped back along the path.
+            path.pop()
+        elif len(path) >= 2 and _adjacent(path[-2], target):
+            path[-1] = target
+        else:
+            path.append(target)
+        self.path_target = target
+        return True
+
+    def path_request(self) -> Optional[Tuple[int, int]]:
+        target = self.engine.player
+        distance = max(abs(target.x - self.entity.x), abs(target.y - self.entity.y))
+        if (
+            self.engine.game_map.visible[self.entity.x, self.entity.y]
+            and distance > 1
+            and not self.update_path((target.x, target.y))
+            and self.engine.game_map.connected(
+                (self.entity.x, self.entity.y), (target.x, target.y)
+            )
+        ):
+            return target.x, target.y
+        return None
+
     def perform(self) -> None:
         """
         A hostile enemy will attempt to move towards a player and attack it, 
         if possible.
+
+        Its path is only searched again when the player moved by more than a tile,
+        the map changed, or the way is blocked.
+
+        Out of sight of the player, it goes to where it last saw them, then follows
+        any noise, or else the player's scent.  So does a monster whose path is
+        blocked.
         """
         target = self.engine.player
         dx = target.x - self.entity.x
         dy = target.y - self.entity.y
         distance = max(abs(dx), abs(dy)) # Chebyshev distance
 
-        if self.engine.game_map.visible[self.entity.x, self.entity.y]:
+        game_map = self.engine.game_map
+        in_sight = game_map.visible[self.entity.x, self.entity.y]
+        if in_sight:
             if distance <= 1:
                 return MeleeAttack(self.entity, dx, dy).perform()
-            self.path = self.get_path_to(target.x, target.y)
-        
+            if self.planned_path is not None:
+                self.set_path(self.planned_path, (target.x, target.y))
+            elif not self.update_path((target.x, target.y)):
+                self.set_path(
+                    self.get_path_to(target.x, target.y), (target.x, target.y)
+                )
+        self.planned_path = None
+
+        if (
+            self.path
+            and in_sight
+            and game_map.get_blocking_entity_at_location(*self.path[0])
+        ):
+            # Search again, the search goes around whatever is in the way.
+            self.set_path(self.get_path_to(target.x, target.y), (target.x, target.y))
+
         if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
-                self.entity, dest_x - self.entity.x, dest_y - self.entity.y
-            ).perform()
+            dest_x, dest_y = self.path[0]
+            if not game_map.get_blocking_entity_at_location(dest_x, dest_y):
+                self.path.popleft()
+                return MovementAction(
+                    self.entity, dest_x - self.entity.x, dest_y - self.entity.y
+                ).perform()
+            # Still blocked, drop the path rather than wait on it forever.
+            self.path.clear()
+
+        for field in (game_map.noise, game_map.scent):
+            step = field.gradient_step(
+                self.entity.x,
+                self.entity.y,
+                game_map.tiles["walkable"],
+                game_map.get_blocking_entity_at_location,
+            )
+            if step is not None:
+                return MovementAction(self.entity, *step).perform()
+
+        return WaitAction(self.entity).perform()
+
 
-        return WaitAction(self.entity).perform()
\ No newline at end of file
+def _adjacent(a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1])) == 1
@@ -46,5 +46,6 @@ class Fighter(BaseComponent):
         self.entity.ai = None
         self.entity.name = f"Corpse of {self.entity.name}"
         self.entity.render_order = RenderOrder.CORPSE
+        self.entity.game_map.actor_died(self.entity)
 
         self.engine.message_log.add_message(death_message, death_message_color)
\ No newline at end of file
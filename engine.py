@@ -1,56 +1,148 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 from tcod.console import Console
 from tcod.map import compute_fov
 
 from actions import EscapeAction, MovementAction
+from camera import Camera
+from combat import CombatResolver
+from fields import SCENT_AMOUNT
 from input_handlers import MainGameEventHandler
+from journal import ActionJournal
 from message_log import MessageLog
+from packed_mask import PackedMask
+from path_planning import plan_paths
+from profiler import Profiler
 from render_functions import render_bar, render_names_at_mouse_location
 
 if TYPE_CHECKING:
+    from actions import Action
     from entity import Actor
     from game_map import GameMap
+    from game_world import GameWorld
     from input_handlers import EventHandler
 
 class Engine:
     game_map: GameMap
+    game_world: GameWorld
 
-    def __init__(self, player: Actor) -> None:
+    def __init__(self, player: Actor, seed: int = 0) -> None:
         self.event_handler: EventHandler = MainGameEventHandler(self)
         self.message_log = MessageLog()
+        # Console position of the mouse.
         self.mouse_location = (0, 0)
+        self.camera = Camera(width=80, height=43)
+        self.profiler = Profiler()
+        self.combat = CombatResolver(self)
+        self._next_entity_id = 0
         self.player = player
+        self.player.id = self.new_entity_id()
+        self.journal: Optional[ActionJournal] = ActionJournal(seed, self.player.id)
+
+    def new_entity_id(self) -> int:
+        """
+        Return a fresh id, unique within this engine.
+
+        Ids are handed out in creation order, so a game generated from the same seed
+        always numbers its entities the same way.
+        """
+        entity_id = self._next_entity_id
+        self._next_entity_id += 1
+        return entity_id
+
+    def take_turn(self, action: Action) -> None:
+        """
+        Perform the player's action, then let everything else act.
+        """
+        action.perform()
+        # The player's attack lands before its target gets to act.
+        self.combat.resolve()
+        self.update_fields()
+        self.handle_enemy_turns()
+        self.update_fov()
 
     def handle_enemy_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
-                entity.ai.perform()
+        # Act in id order, so that a replayed session makes the same moves.
+        with self.profiler.phase("enemy_turns"):
+            actors = sorted(self.game_map.actors - {self.player}, key=lambda a: a.id)
+            with self.profiler.phase("plan_paths"):
+                plan_paths(self, actors)
+
+            # Only name the per-AI phases while profiling, this loop runs every turn.
+            profiling = self.profiler.enabled
+            for entity in actors:
+                if not entity.ai:
+                    continue
+                if profiling:
+                    with self.profiler.phase(f"ai.{type(entity.ai).__name__}"):
+                        entity.ai.perform()
+                else:
+                    entity.ai.perform()
+
+            with self.profiler.phase("combat"):
+                self.combat.resolve()
 
-    def update_fov(self) -> None:
+    def update_fields(self) -> None:
+        """
+        Leave the player's scent on their tile, then spread and fade the map's scent
+        and noise.
+        """
+        with self.profiler.phase("fields"):
+            game_map = self.game_map
+            game_map.scent.deposit(self.player.x, self.player.y, SCENT_AMOUNT)
+            walkable = game_map.tiles["walkable"]
+            game_map.scent.update(walkable)
+            game_map.noise.update(walkable)
+
+    def update_fov(self, radius: int = 8) -> None:
         """
         Recompute visible area (field of view/FOV) based on player point of view.
+
+        Only the region within `radius` of the player is computed and updated, so the
+        cost of this doesn't depend on the size of the map.
         """
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=8,
-        )
+        with self.profiler.phase("fov"):
+            game_map = self.game_map
+            x, y = self.player.x, self.player.y
+            x1, y1 = max(0, x - radius), max(0, y - radius)
+            window = (slice(x1, x + radius + 1), slice(y1, y + radius + 1))
 
-        # If a tile has ever been visible, mark it as explored.
-        self.game_map.explored |= self.game_map.visible
+            game_map.visible[game_map.fov_window] = False
+            game_map.visible[window] = compute_fov(
+                game_map.tiles["transparent"][window],
+                (x - x1, y - y1),
+                radius=radius,
+            )
+            game_map.fov_window = window
+
+            # If a tile has ever been visible, mark it as explored.
+            if isinstance(game_map.explored, PackedMask):
+                game_map.explored.or_region(game_map.visible, window)
+            else:
+                game_map.explored[window] |= game_map.visible[window]
+
+            # This runs at the end of every turn, when the map may have changed.
+            game_map.dirty = True
 
     def render(self, console: Console) -> None:
-        self.game_map.render(console)
-        self.message_log.render(console=console, x=21, y=45, width=40, height=5)
+        with self.profiler.phase("render.map"):
+            self.camera.center_on(self.player.x, self.player.y, self.game_map)
+            self.game_map.render(console, self.camera)
+
+        with self.profiler.phase("render.messages"):
+            self.message_log.render(console=console, x=21, y=45, width=40, height=5)
+
+        with self.profiler.phase("render.ui"):
+            render_bar(
+                console=console,
+                current_value=self.player.fighter.hp,
+                max_value=self.player.fighter.max_hp,
+                total_width=20,
+            )
 
-        render_bar(
-            console=console,
-            current_value=self.player.fighter.hp,
-            max_value=self.player.fighter.max_hp,
-            total_width=20,
-        )
+            render_names_at_mouse_location(console=console, x=21, y=44, engine=self)
 
-        render_names_at_mouse_location(console=console, x=21, y=44, engine=self)
+        if self.profiler.enabled:
+            self.profiler.render(console)
@@ -28,7 +28,10 @@ class Entity:
         name: str = "<Unnamed>",
         blocks_movement: bool = False,
         render_order: RenderOrder = RenderOrder.CORPSE,
+        light_radius: int = 0,
+        light_color: Tuple[int, int, int] = (255, 255, 255),
     ) -> None:
+        self.id = 0
         self.x = x
         self.y = y
         self.char = char
@@ -36,20 +39,25 @@ class Entity:
         self.name = name
         self.blocks_movement = blocks_movement
         self.render_order = render_order
+        # Entities with a light radius light up their surroundings.
+        self.light_radius = light_radius
+        self.light_color = light_color
 
         if game_map:
+            self.id = game_map.engine.new_entity_id()
             self.game_map = game_map
-            game_map.entities.add(self)
+            game_map.add_entity(self)
 
     def spawn(self: T, game_map: GameMap, x: int, y: int) -> T:
         """
         Spawn a copy of this instance at the given location.
         """
         clone = copy.deepcopy(self)
+        clone.id = game_map.engine.new_entity_id()
         clone.x = x
         clone.y = y
         clone.game_map = game_map
-        game_map.entities.add(clone)
+        game_map.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, game_map: Optional[GameMap] = None) -> None:
@@ -60,9 +68,9 @@ class Entity:
         self.y = y
         if game_map:
             if hasattr(self, "game_map"):
-                self.game_map.entities.remove(self)
+                self.game_map.remove_entity(self)
             self.game_map = game_map
-            game_map.entities.add(self)
+            game_map.add_entity(self)
 
 
     def move(self, dx: int, dy: int) -> None:
@@ -84,6 +92,8 @@ class Actor(Entity):
         name: str = "<Unnamed>", 
         ai_cls: Type[BaseAI],
         fighter: Fighter,
+        light_radius: int = 0,
+        light_color: Tuple[int, int, int] = (255, 255, 255),
     ) -> None:
         super().__init__(
             x=x, 
@@ -92,7 +102,9 @@ class Actor(Entity):
             color=color, 
             name=name, 
             blocks_movement=True,
-            render_order=RenderOrder.ACTOR
+            render_order=RenderOrder.ACTOR,
+            light_radius=light_radius,
+            light_color=light_color,
         )
 
         self.ai: Optional[BaseAI] = ai_cls(self)
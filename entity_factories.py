@@ -1,6 +1,39 @@
-from components.ai import HostileEnemy
+from __future__ import annotations
+
+import functools
+import json
+import os
+from typing import Any, Dict, List, Type, TYPE_CHECKING
+
+import numpy as np
+
+from components.ai import BaseAI, HostileEnemy
 from components.fighter import Fighter
-from entity import Actor
+from entity import Actor, Entity
+from entity_table import AI_CLASSES
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+# Monster kinds are defined in data/monsters.json.  Procgen picks among them by
+# spawn weight.  `light_radius` and `light_color` are optional, monsters without
+# them give off no light.
+MONSTERS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "monsters.json"
+)
+
+monster_dt = np.dtype(
+    [
+        ("char", np.int32),  # unicode codepoint
+        ("color", "3B"),
+        ("hp", np.int32),
+        ("defense", np.int32),
+        ("power", np.int32),
+        ("spawn_weight", np.float64),
+        ("light_radius", np.uint8),
+        ("light_color", "3B"),
+    ]
+)
 
 player = Actor(
     char="@", 
@@ -10,18 +43,97 @@ player = Actor(
     fighter=Fighter(hp=30, defense=2, power=5)
 )
 
-orc = Actor(
-    char="o", 
-    color=(63, 127, 63), 
-    name="Orc", 
-    ai_cls=HostileEnemy,
-    fighter=Fighter(hp=10, defense=0, power=3)
+torch = Entity(
+    char="*",
+    color=(255, 160, 40),
+    name="Torch",
+    light_radius=6,
+    light_color=(150, 90, 20),
 )
 
-troll = Actor(
-    char="T", 
-    color=(0, 127, 0), 
-    name="Troll",
-    ai_cls=HostileEnemy,
-    fighter=Fighter(hp=16, defense=1, power=4)
-)
\ No newline at end of file
+
+class MonsterTable:
+    """
+    The stats of every monster kind, one row per kind.
+    """
+    def __init__(self, definitions: List[Dict[str, Any]]) -> None:
+        self.names = [definition["name"] for definition in definitions]
+        self.kinds = {name.lower(): kind for kind, name in enumerate(self.names)}
+        self.ai_classes: List[Type[BaseAI]] = [
+            AI_CLASSES[definition["ai"]] for definition in definitions
+        ]
+        self.stats = np.array(
+            [
+                (
+                    ord(definition["char"]),
+                    tuple(definition["color"]),
+                    definition["hp"],
+                    definition["defense"],
+                    definition["power"],
+                    definition["spawn_weight"],
+                    definition.get("light_radius", 0),
+                    tuple(definition.get("light_color", (255, 255, 255))),
+                )
+                for definition in definitions
+            ],
+            dtype=monster_dt,
+        )
+        self.cumulative_weights = np.cumsum(self.stats["spawn_weight"])
+        self.prototypes: Dict[int, Actor] = {}
+
+    def sample(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        """
+        Draw `count` monster kinds at random, in proportion to their spawn weights.
+        """
+        rolls = rng.random(count) * self.cumulative_weights[-1]
+        return np.searchsorted(self.cumulative_weights, rolls, side="right")
+
+    def prototype(self, kind: int) -> Actor:
+        """
+        Return the actor monsters of the given kind are spawned from.
+
+        Prototypes are only built for the kinds which are spawned.
+        """
+        prototype = self.prototypes.get(kind)
+        if prototype is None:
+            row = self.stats[kind]
+            prototype = self.prototypes[kind] = Actor(
+                char=chr(row["char"]),
+                color=tuple(int(channel) for channel in row["color"]),
+                name=self.names[kind],
+                ai_cls=self.ai_classes[kind],
+                fighter=Fighter(
+                    hp=int(row["hp"]),
+                    defense=int(row["defense"]),
+                    power=int(row["power"]),
+                ),
+                light_radius=int(row["light_radius"]),
+                light_color=tuple(int(channel) for channel in row["light_color"]),
+            )
+        return prototype
+
+    def spawn(self, kind: int, game_map: GameMap, x: int, y: int) -> Actor:
+        """
+        Spawn a new monster of the given kind at the given location.
+        """
+        return self.prototype(kind).spawn(game_map, x, y)
+
+
+@functools.lru_cache(maxsize=None)
+def monster_table() -> MonsterTable:
+    """
+    Compile the monster definitions, on first use rather than on import, so the cost
+    of importing this module doesn't grow with the number of monster kinds.
+    """
+    with open(MONSTERS_PATH) as f:
+        return MonsterTable(json.load(f))
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Look up monster prototypes by name, such as `entity_factories.orc`.
+    """
+    table = monster_table()
+    if name in table.kinds:
+        return table.prototype(table.kinds[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
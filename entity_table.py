@@ -0,0 +1,118 @@
+"""
+Entities packed into a NumPy structured array, one row per entity.
+
+Used wherever entities are stored away from the live game, in save files and in
+frozen levels.
+"""
+from __future__ import annotations
+
+import functools
+from typing import Dict, List, Type
+
+import numpy as np
+
+from components.ai import BaseAI, HostileEnemy
+from components.fighter import Fighter
+from entity import Actor, Entity
+from render_order import RenderOrder
+
+# AI classes which may be packed, by name.
+AI_CLASSES: Dict[str, Type[BaseAI]] = {
+    cls.__name__: cls for cls in (HostileEnemy,)
+}
+
+
+@functools.lru_cache(maxsize=None)
+def entity_dt(name_length: int) -> np.dtype:
+    """
+    The structured data type of an entity table row.
+    """
+    return np.dtype(
+        [
+            ("id", np.uint32),
+            ("x", np.int32),
+            ("y", np.int32),
+            ("char", np.int32),  # unicode codepoint
+            ("color", "3B"),
+            ("name", f"U{name_length}"),
+            ("blocks_movement", np.bool_),
+            ("render_order", np.uint8),
+            ("light_radius", np.uint8),
+            ("light_color", "3B"),
+            ("is_actor", np.bool_),
+            ("ai", "U16"),  # Name of the AI class, empty if there is none.
+            ("hp", np.int32),
+            ("max_hp", np.int32),
+            ("defense", np.int32),
+            ("power", np.int32),
+        ]
+    )
+
+
+def pack_entities(entities: List[Entity]) -> np.ndarray:
+    """
+    Return a table with one row per entity.
+    """
+    name_length = max((len(entity.name) for entity in entities), default=1)
+    table = np.zeros(len(entities), dtype=entity_dt(name_length))
+
+    for row, entity in zip(table, entities):
+        row["id"] = entity.id
+        row["x"] = entity.x
+        row["y"] = entity.y
+        row["char"] = ord(entity.char)
+        row["color"] = entity.color
+        row["name"] = entity.name
+        row["blocks_movement"] = entity.blocks_movement
+        row["render_order"] = entity.render_order.value
+        row["light_radius"] = entity.light_radius
+        row["light_color"] = entity.light_color
+        if isinstance(entity, Actor):
+            row["is_actor"] = True
+            row["ai"] = type(entity.ai).__name__ if entity.ai else ""
+            row["hp"] = entity.fighter.hp
+            row["max_hp"] = entity.fighter.max_hp
+            row["defense"] = entity.fighter.defense
+            row["power"] = entity.fighter.power
+
+    return table
+
+
+def unpack_entities(table: np.ndarray) -> List[Entity]:
+    """
+    Rebuild the entities of a table made by `pack_entities`.
+    """
+    entities: List[Entity] = []
+
+    for row in table.tolist():
+        row = dict(zip(table.dtype.names, row))
+        entity: Entity
+        if row["is_actor"]:
+            entity = Actor(
+                ai_cls=AI_CLASSES.get(row["ai"], HostileEnemy),
+                fighter=Fighter(
+                    hp=row["max_hp"], defense=row["defense"], power=row["power"]
+                ),
+            )
+            # Set the private value, the hp setter would kill the actor all over again.
+            entity.fighter._hp = row["hp"]
+            if not row["ai"]:
+                entity.ai = None
+        else:
+            entity = Entity()
+        entity.id = row["id"]
+        entity.x = row["x"]
+        entity.y = row["y"]
+        entity.char = chr(row["char"])
+        entity.color = tuple(row["color"])
+        entity.name = row["name"]
+        entity.blocks_movement = row["blocks_movement"]
+        entity.render_order = RenderOrder(row["render_order"])
+        # Tables saved before lights were added have no light columns.
+        entity.light_radius = int(row.get("light_radius", 0))
+        entity.light_color = tuple(
+            int(channel) for channel in row.get("light_color", (255, 255, 255))
+        )
+        entities.append(entity)
+
+    return entities
@@ -0,0 +1,249 @@
+"""
+Scent and noise: values which spread over a map's walkable tiles and fade over time.
+
+The player leaves scent wherever they stand, and fighting makes noise.  Each turn
+both fields decay and noise diffuses, with a few whole-array operations, and monsters
+which lost sight of the player track them by moving up the fields' gradient.
+
+A field only holds an array for the bounding box of its non-zero values, so the cost
+of a turn, and of saving the field, depends on how far the values spread, not on the
+size of the map.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+
+# Values below this are dropped, so that the fields stay small.
+MIN_VALUE = 0.01
+
+# Left by the player on their tile each turn.
+SCENT_AMOUNT = 1.0
+# Made by each attack which lands.
+NOISE_AMOUNT = 50.0
+
+
+class Field:
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        *,
+        decay: float,
+        diffusion: float,
+        spread: int = 1,
+        origin: Tuple[int, int] = (0, 0),
+        values: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Each turn, `diffusion` is the share of a tile's value which averages out
+        with its neighbors, which is repeated `spread` times, and every value is then
+        multiplied by `decay`.
+
+        `origin` and `values` may be given when restoring a field, `values` holds
+        the field's values from `origin` on.
+        """
+        self.width = width
+        self.height = height
+        self.decay = decay
+        self.diffusion = diffusion
+        self.spread = spread
+        self.origin = origin
+        if values is None:
+            values = np.zeros((0, 0), dtype=np.float32, order="F")
+        self.values = values
+
+    @property
+    def window(self) -> Tuple[slice, slice]:
+        """
+        The region of the map `values` covers.
+        """
+        x, y = self.origin
+        return slice(x, x + self.values.shape[0]), slice(y, y + self.values.shape[1])
+
+    def resize(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        """
+        Make `values` cover the region from (x1, y1) to (x2, y2), excluded.
+
+        Values outside of the region are dropped.
+        """
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = max(x1, min(self.width, x2)), max(y1, min(self.height, y2))
+        values = np.zeros((x2 - x1, y2 - y1), dtype=np.float32, order="F")
+        old_x, old_y = self.window
+        left, right = max(x1, old_x.start), min(x2, old_x.stop)
+        top, bottom = max(y1, old_y.start), min(y2, old_y.stop)
+        if left < right and top < bottom:
+            values[left - x1 : right - x1, top - y1 : bottom - y1] = self.values[
+                left - old_x.start : right - old_x.start,
+                top - old_y.start : bottom - old_y.start,
+            ]
+        self.origin = x1, y1
+        self.values = values
+
+    def deposit(self, x: np.ndarray, y: np.ndarray, amount: float) -> None:
+        """
+        Add `amount` at each of the given positions.
+
+        `x` and `y` may be single coordinates or arrays of them.
+        """
+        x, y = np.asarray(x), np.asarray(y)
+        if x.size == 0:
+            return
+        x1, x2 = int(x.min()), int(x.max()) + 1
+        y1, y2 = int(y.min()), int(y.max()) + 1
+        window_x, window_y = self.window
+        if self.values.size:
+            x1, x2 = min(x1, window_x.start), max(x2, window_x.stop)
+            y1, y2 = min(y1, window_y.start), max(y2, window_y.stop)
+        if (x1, y1, x2, y2) != (
+            window_x.start,
+            window_y.start,
+            window_x.stop,
+            window_y.stop,
+        ):
+            self.resize(x1, y1, x2, y2)
+        np.add.at(self.values, (x - self.origin[0], y - self.origin[1]), amount)
+
+    def update(self, walkable: np.ndarray) -> None:
+        """
+        Diffuse and decay this field by one turn.  Nothing spreads into walls.
+        """
+        if not self.values.size:
+            return
+        if self.spread:
+            # Values spread by one tile at each step.
+            window_x, window_y = self.window
+            self.resize(
+                window_x.start - self.spread,
+                window_y.start - self.spread,
+                window_x.stop + self.spread,
+                window_y.stop + self.spread,
+            )
+            walkable_window = np.asarray(walkable[self.window], dtype=bool)
+            # Average with the walkable neighbors only, so that walls don't soak
+            # values up.
+            padded_walkable = _padded(walkable_window.astype(np.float32))
+            neighbors_count = np.maximum(
+                padded_walkable[:-2, 1:-1]
+                + padded_walkable[2:, 1:-1]
+                + padded_walkable[1:-1, :-2]
+                + padded_walkable[1:-1, 2:],
+                1,
+            )
+            # Each step is `value * keep + neighbors_sum * share`, zeroed on walls,
+            # done in place in one padded buffer to keep the number of NumPy calls
+            # per step low.
+            keep = (1 - self.diffusion) * walkable_window
+            share = self.diffusion * walkable_window / neighbors_count
+            padded = _padded(self.values)
+            values = padded[1:-1, 1:-1]
+            neighbors_sum = np.empty_like(values)
+            for _ in range(self.spread):
+                np.add(padded[:-2, 1:-1], padded[2:, 1:-1], out=neighbors_sum)
+                neighbors_sum += padded[1:-1, :-2]
+                neighbors_sum += padded[1:-1, 2:]
+                neighbors_sum *= share
+                values *= keep
+                values += neighbors_sum
+            self.values = np.asfortranarray(values)
+
+        self.values *= self.decay
+        self.values[self.values < MIN_VALUE] = 0
+        self.shrink()
+
+    def shrink(self) -> None:
+        """
+        Shrink `values` to the bounding box of the non-zero values.
+        """
+        nonzero = self.values > 0
+        columns = np.flatnonzero(nonzero.any(axis=1))
+        rows = np.flatnonzero(nonzero.any(axis=0))
+        x, y = self.origin
+        if columns.size == 0:
+            self.resize(x, y, x, y)
+            return
+        self.resize(
+            x + int(columns[0]),
+            y + int(rows[0]),
+            x + int(columns[-1]) + 1,
+            y + int(rows[-1]) + 1,
+        )
+
+    def gradient_step(
+        self,
+        x: int,
+        y: int,
+        walkable: np.ndarray,
+        is_blocked: Callable[[int, int], Any],
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Return the step towards the neighbor holding the highest value, or None if
+        none holds more than the tile at (x, y).
+
+        Only walkable neighbors for which `is_blocked(x, y)` is false are stepped to.
+        """
+        origin_x, origin_y = self.origin
+        # The neighborhood of (x, y), within `values`.
+        x1, y1 = max(origin_x, x - 1), max(origin_y, y - 1)
+        x2 = min(origin_x + self.values.shape[0], x + 2)
+        y2 = min(origin_y + self.values.shape[1], y + 2)
+        if x1 >= x2 or y1 >= y2:
+            return None
+        neighborhood = self.values[
+            x1 - origin_x : x2 - origin_x, y1 - origin_y : y2 - origin_y
+        ] * np.asarray(walkable[x1:x2, y1:y2])
+        if x1 <= x < x2 and y1 <= y < y2:
+            current_value = neighborhood[x - x1, y - y1]
+        else:
+            current_value = 0
+        # From the highest value down, the first neighbor which isn't blocked.
+        for index in np.argsort(-neighborhood, axis=None, kind="stable").tolist():
+            best_x, best_y = np.unravel_index(index, neighborhood.shape)
+            if neighborhood[best_x, best_y] <= current_value:
+                return None
+            step_x, step_y = int(best_x) + x1 - x, int(best_y) + y1 - y
+            if not is_blocked(x + step_x, y + step_y):
+                return step_x, step_y
+        return None
+
+
+def _padded(array: np.ndarray) -> np.ndarray:
+    """
+    Return `array` with a border of zeros, like `np.pad` but with less overhead.
+    """
+    padded = np.zeros(
+        (array.shape[0] + 2, array.shape[1] + 2), dtype=array.dtype, order="F"
+    )
+    padded[1:-1, 1:-1] = array
+    return padded
+
+
+def scent_field(
+    width: int,
+    height: int,
+    origin: Tuple[int, int] = (0, 0),
+    values: Optional[np.ndarray] = None,
+) -> Field:
+    """
+    Scent lingers for a hundred turns or so.  It doesn't spread: a trail spreading
+    wider in rooms than in corridors would have local peaks to get stuck on.
+    """
+    return Field(
+        width, height, decay=0.97, diffusion=0.0, spread=0, origin=origin, values=values
+    )
+
+
+def noise_field(
+    width: int,
+    height: int,
+    origin: Tuple[int, int] = (0, 0),
+    values: Optional[np.ndarray] = None,
+) -> Field:
+    """
+    Noise spreads quickly, and dies out within a few turns.
+    """
+    return Field(
+        width, height, decay=0.7, diffusion=0.8, spread=4, origin=origin, values=values
+    )
@@ -0,0 +1,159 @@
+"""
+Frames of the console, encoded as the cells which changed since the previous frame.
+
+A delta is a small header, the runs of consecutive changed cells, and the new
+contents of those cells, so its size is proportional to what changed.  The first
+frame, or a frame of a new size, holds every cell.  Deltas can be written to a
+recording, or sent to anyone holding a `FrameDecoder`.  The game records a session
+when started with `python main.py --record-frames session.frames`, and
+
+    python frame_diff.py session.frames
+
+plays a recording back in a window.
+"""
+from __future__ import annotations
+
+import struct
+import sys
+import time
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+import numpy as np
+import tcod
+
+MAGIC = b"TCF1"
+FRAME = struct.Struct("<HHII")  # width, height, number of runs, number of cells
+RECORD = struct.Struct("<Id")  # size of the delta, seconds since recording started
+
+# A console cell, as in `Console.tiles_rgb`.
+CELL_DT = np.dtype([("ch", "<i4"), ("fg", "3u1"), ("bg", "3u1")])
+
+
+class FrameEncoder:
+    def __init__(self) -> None:
+        # The previous frame's cells, in column-major order.
+        self.previous: Optional[np.ndarray] = None
+
+    def encode(self, tiles: np.ndarray) -> bytes:
+        """
+        Return the delta from the previous frame to `tiles`, a console's `tiles_rgb`.
+        """
+        width, height = tiles.shape
+        # A copy, the console's buffer is redrawn in place.
+        cells = np.array(tiles.ravel(order="F"), dtype=CELL_DT)
+        if self.previous is None or self.previous.size != cells.size:
+            changed = np.ones(cells.size, dtype=bool)
+        else:
+            changed = (
+                cells.view(np.uint8).reshape(-1, CELL_DT.itemsize)
+                != self.previous.view(np.uint8).reshape(-1, CELL_DT.itemsize)
+            ).any(axis=1)
+        self.previous = cells
+
+        edges = np.diff(np.concatenate(([0], changed.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        lengths = np.flatnonzero(edges == -1) - starts
+        changed_cells = cells[changed]
+        return b"".join(
+            (
+                FRAME.pack(width, height, starts.size, changed_cells.size),
+                starts.astype("<u4").tobytes(),
+                lengths.astype("<u4").tobytes(),
+                changed_cells.tobytes(),
+            )
+        )
+
+
+class FrameDecoder:
+    def __init__(self) -> None:
+        # The current frame's cells, in column-major order.
+        self.cells: Optional[np.ndarray] = None
+
+    def decode(self, delta: bytes) -> np.ndarray:
+        """
+        Apply a delta made by `FrameEncoder.encode`, and return the new frame.
+        """
+        width, height, runs, count = FRAME.unpack_from(delta)
+        if self.cells is None or self.cells.size != width * height:
+            self.cells = np.zeros(width * height, dtype=CELL_DT)
+
+        offset = FRAME.size
+        starts = np.frombuffer(delta, "<u4", runs, offset).astype(np.intp)
+        offset += runs * 4
+        lengths = np.frombuffer(delta, "<u4", runs, offset).astype(np.intp)
+        offset += runs * 4
+        values = np.frombuffer(delta, CELL_DT, count, offset)
+
+        # The index of each changed cell: its run's start, plus its place in the run.
+        run_offsets = np.cumsum(lengths) - lengths
+        indices = np.repeat(starts - run_offsets, lengths) + np.arange(count)
+        self.cells[indices] = values
+        return self.cells.reshape((width, height), order="F").copy()
+
+
+class FrameRecorder:
+    """
+    Write the frames which changed to a recording file.
+    """
+    def __init__(self, path: str) -> None:
+        self.file: BinaryIO = open(path, "wb")
+        self.file.write(MAGIC)
+        self.encoder = FrameEncoder()
+        self.start_time = time.perf_counter()
+
+    def record(self, console: tcod.console.Console) -> None:
+        delta = self.encoder.encode(console.tiles_rgb)
+        if FRAME.unpack_from(delta)[3] == 0:
+            # Nothing changed.
+            return
+        self.file.write(RECORD.pack(len(delta), time.perf_counter() - self.start_time))
+        self.file.write(delta)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def read_frames(path: str) -> Iterator[Tuple[float, bytes]]:
+    """
+    Iterate over the (time, delta) of each frame of a recording.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a frame recording.")
+        while True:
+            record = f.read(RECORD.size)
+            if len(record) < RECORD.size:
+                return
+            size, frame_time = RECORD.unpack(record)
+            yield frame_time, f.read(size)
+
+
+def play(path: str) -> None:
+    tileset = tcod.tileset.load_tilesheet(
+        "dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD
+    )
+    decoder = FrameDecoder()
+    console: Optional[tcod.console.Console] = None
+    with tcod.context.new_terminal(
+        80, 50, tileset=tileset, title="Roguelike Tutorial", vsync=True
+    ) as context:
+        start_time = time.perf_counter()
+        for frame_time, delta in read_frames(path):
+            frame = decoder.decode(delta)
+            if console is None or console.tiles_rgb.shape != frame.shape:
+                console = tcod.console.Console(*frame.shape, order="F")
+            console.tiles_rgb[...] = frame
+
+            # Play in real time, but don't wait on the player more than a second.
+            start_time = max(start_time, time.perf_counter() - frame_time - 1)
+            delay = start_time + frame_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            context.present(console)
+            for event in tcod.event.get():
+                if isinstance(event, tcod.event.Quit):
+                    return
+
+
+if __name__ == "__main__":
+    play(sys.argv[1])
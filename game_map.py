@@ -1,16 +1,22 @@
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+import itertools
+from typing import Any, Iterable, Optional, Set, Tuple, TYPE_CHECKING
 
 import numpy as np
 from tcod.console import Console
 
 from entity import Actor
+from fields import Field, noise_field, scent_field
+from lighting import Lighting
+from packed_mask import PackedMask
 import tile_types
 
 if TYPE_CHECKING:
+    from camera import Camera
     from engine import Engine
     from entity import Entity
+    from level_layout import LevelLayout
 
 class GameMap:
     def __init__(
@@ -18,15 +24,66 @@ class GameMap:
         engine: Engine,
         width: int,
         height: int,
-        entities: Iterable[Entity] = ()
+        entities: Iterable[Entity] = (),
+        *,
+        tiles: Optional[np.ndarray] = None,
+        visible: Optional[np.ndarray] = None,
+        explored: Optional[np.ndarray] = None,
+        scent: Optional[Field] = None,
+        noise: Optional[Field] = None,
+        packed_masks: bool = False,
     ) -> None:
+        """
+        `tiles`, `visible`, `explored`, `scent` and `noise` may be given when
+        restoring an existing map, they are used as-is instead of allocating new
+        ones.
+
+        If `packed_masks` is True, new `visible` and `explored` masks are
+        `PackedMask`s, which take one bit per tile instead of a byte.
+        """
         self.engine = engine
         self.width = width
         self.height = height
-        self.entities = set(entities)
-        self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
-        self.visible = np.full((width, height), fill_value=False, order="F")
-        self.explored = np.full((width, height), fill_value=False, order="F")
+        self.entities: Set[Entity] = set()
+        # The entities by kind.  Kept up to date by `add_entity`, `remove_entity`
+        # and `actor_died`, so that they never need to be filtered out of
+        # `entities`.
+        self.live_actors: Set[Actor] = set()
+        self.corpses: Set[Actor] = set()
+        self.items: Set[Entity] = set()
+        for entity in entities:
+            self.add_entity(entity)
+        if tiles is None:
+            tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        if visible is None:
+            if packed_masks:
+                visible = PackedMask(width, height)
+            else:
+                visible = np.full((width, height), fill_value=False, order="F")
+        if explored is None:
+            if packed_masks:
+                explored = PackedMask(width, height)
+            else:
+                explored = np.full((width, height), fill_value=False, order="F")
+        self.tiles = tiles
+        self.visible = visible
+        self.explored = explored
+        # What monsters which can't see the player track them by.
+        self.scent = scent or scent_field(width, height)
+        self.noise = noise or noise_field(width, height)
+        # The region of `visible` which may hold visible tiles.
+        self.fov_window = (slice(None), slice(None))
+        self.downstairs_location: Optional[Tuple[int, int]] = None
+        self.upstairs_location: Optional[Tuple[int, int]] = None
+        # The rooms and connectivity of a generated level, None for other maps, and
+        # the `cost_version` it was worked out at.
+        self.layout: Optional[LevelLayout] = None
+        self.layout_version = 0
+        # True if this map changed since it was last saved.
+        self.dirty = True
+        # Bumped by `tiles_changed`, paths searched before a bump are stale.
+        self.cost_version = 0
+        self.lighting = Lighting(self)
 
     def in_bounds(self, x: int, y: int) -> bool:
         """
@@ -34,16 +91,85 @@ class GameMap:
         """
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def set_tiles(self, key: Any, value: Any) -> None:
+        """
+        Set the tiles at `key`.  Change tiles through this, not `tiles` itself.
+        """
+        self.tiles[key] = value
+        self.tiles_changed()
+
+    def tiles_changed(self) -> None:
+        """
+        Note that tiles changed, so what was worked out from them is out of date.
+        """
+        self.cost_version += 1
+        self.dirty = True
+
+    def set_layout(self, layout: Optional[LevelLayout]) -> None:
+        self.layout = layout
+        self.layout_version = self.cost_version
+
+    def connected(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        """
+        Return False if there is no walkable path between two positions.
+
+        Without a layout, or if tiles changed since it was worked out, this can't be
+        known, so return True.
+        """
+        if self.layout is None or self.layout_version != self.cost_version:
+            return True
+        return self.layout.connected(a, b)
+
     @property
-    def actors(self) -> Iterator[Actor]:
+    def packed_masks(self) -> bool:
+        return isinstance(self.explored, PackedMask)
+
+    def explored_fraction(self) -> float:
         """
-        Iterate over this map's living actors.
+        Return the fraction of the walkable tiles which have been explored.
         """
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, Actor) and entity.is_alive
-        )
+        walkable = self.tiles["walkable"]
+        if isinstance(self.explored, PackedMask):
+            explored = (PackedMask.from_array(walkable) & self.explored).count()
+        else:
+            explored = int(np.count_nonzero(walkable & self.explored))
+        return explored / max(1, int(np.count_nonzero(walkable)))
+
+    @property
+    def actors(self) -> Set[Actor]:
+        """
+        This map's living actors.  Don't modify it, it is kept up to date.
+        """
+        return self.live_actors
+
+    def _kind_of(self, entity: Entity) -> Set:
+        """
+        Return the set of entities of the same kind as `entity`.
+        """
+        if isinstance(entity, Actor):
+            return self.live_actors if entity.is_alive else self.corpses
+        return self.items
+
+    def add_entity(self, entity: Entity) -> None:
+        self.entities.add(entity)
+        self._kind_of(entity).add(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        self.entities.remove(entity)
+        self._kind_of(entity).discard(entity)
+
+    def actor_died(self, actor: Actor) -> None:
+        """
+        Move an actor which was just killed to the corpses.
+        """
+        self.live_actors.discard(actor)
+        self.corpses.add(actor)
+
+    def blocking_candidates(self) -> Iterable[Entity]:
+        """
+        Iterate over the entities which may block movement: corpses never do.
+        """
+        return itertools.chain(self.live_actors, self.items)
 
     def get_blocking_entity_at_location(
         self, location_x: int, location_y: int
@@ -52,7 +178,7 @@ class GameMap:
         If there is a blocking entity at the location, return it.
         Otherwise, return None.
         """
-        for entity in self.entities:
+        for entity in self.blocking_candidates():
             if (
                 entity.blocks_movement
                 and entity.x == location_x
@@ -67,31 +193,50 @@ class GameMap:
                 return actor
         return None
 
-    def render(self, console: Console) -> None:
+    def render(self, console: Console, camera: Camera) -> None:
         """
-        Renders the map.
+        Renders the part of the map under the camera's viewport.
 
         If a tile is in the visible array, draw it with light colors.
         If a tile is not in the visible array, but has been explored, draw it with dark
             colors.
         Otherwise, draw it with shroud colors.
+        Visible tiles are then brightened by the light falling on them.
         """
-        console.tiles_rgb[0:self.width, 0:self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
+        window = camera.window(self)
+        width = window[0].stop - window[0].start
+        height = window[1].stop - window[1].start
+
+        visible = self.visible[window]
+        graphics = np.select(
+            condlist=[visible, self.explored[window]],
+            choicelist=[self.tiles["light"][window], self.tiles["dark"][window]],
             default=tile_types.shroud,
         )
 
+        light = self.lighting.light(window)
+        if light is not None:
+            brightness = 1 + light * visible[..., np.newaxis]
+            for channel in ("fg", "bg"):
+                graphics[channel] = np.minimum(graphics[channel] * brightness, 255)
+
+        console.tiles_rgb[0:width, 0:height] = graphics
+
+        entities_in_view = [
+            entity
+            for entity in self.entities
+            if window[0].start <= entity.x < window[0].stop
+            and window[1].start <= entity.y < window[1].stop
+        ]
         entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
+            entities_in_view, key=lambda x: x.render_order.value
         )
 
         for entity in entities_sorted_for_rendering:
             # Only print visible entities
             if self.visible[entity.x, entity.y]:
                 console.print(
-                    entity.x,
-                    entity.y,
+                    *camera.map_to_screen(entity.x, entity.y),
                     entity.char,
                     fg=entity.color,
-                )
\ No newline at end of file
+                )
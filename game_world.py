@@ -0,0 +1,175 @@
+"""
+The floors of the dungeon.
+
+Only the current floor is a live GameMap.  The others are frozen: their tiles are
+kept as a tile id array, `explored` is bit-packed, and their entities are packed into
+an entity table, so each of them costs a few kilobytes.  A floor is thawed back into
+a GameMap when the player enters it, taking its layout back as it was.  Scent and
+noise are not kept, the trail has gone cold by the time the player comes back.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Set, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from entity_table import pack_entities, unpack_entities
+from game_map import GameMap
+from packed_mask import PackedMask
+from procgen import generate_dungeon
+import tile_types
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Entity
+    from level_layout import LevelLayout
+
+
+class FrozenLevel:
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        tile_ids: np.ndarray,
+        explored_bits: np.ndarray,
+        entities: np.ndarray,
+        downstairs_location: Optional[Tuple[int, int]],
+        upstairs_location: Optional[Tuple[int, int]],
+        layout: Optional[LevelLayout] = None,
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.tile_ids = tile_ids
+        self.explored_bits = explored_bits
+        self.entities = entities
+        self.downstairs_location = downstairs_location
+        self.upstairs_location = upstairs_location
+        self.layout = layout
+        # True until this level is saved.
+        self.dirty = True
+
+    @classmethod
+    def freeze(cls, game_map: GameMap, exclude: Set[Entity]) -> FrozenLevel:
+        """
+        Return a frozen copy of a map, leaving out the entities in `exclude`.
+        """
+        return cls(
+            width=game_map.width,
+            height=game_map.height,
+            tile_ids=tile_types.to_ids(game_map.tiles),
+            explored_bits=np.packbits(game_map.explored[:, :].ravel(order="F")),
+            entities=pack_entities(
+                sorted(game_map.entities - exclude, key=lambda entity: entity.id)
+            ),
+            downstairs_location=game_map.downstairs_location,
+            upstairs_location=game_map.upstairs_location,
+            layout=game_map.layout,
+        )
+
+    def thaw(self, engine: Engine, packed_masks: bool = False) -> GameMap:
+        """
+        Return this level as a live GameMap.
+        """
+        explored_bits = np.unpackbits(
+            self.explored_bits, count=self.width * self.height
+        )
+        explored = np.reshape(
+            explored_bits.astype(bool), (self.width, self.height), order="F"
+        )
+        game_map = GameMap(
+            engine,
+            self.width,
+            self.height,
+            tiles=tile_types.from_ids(self.tile_ids),
+            explored=PackedMask.from_array(explored) if packed_masks else explored,
+            packed_masks=packed_masks,
+        )
+        for entity in unpack_entities(self.entities):
+            entity.game_map = game_map
+            game_map.add_entity(entity)
+        game_map.downstairs_location = self.downstairs_location
+        game_map.upstairs_location = self.upstairs_location
+        if self.layout:
+            game_map.set_layout(self.layout)
+        return game_map
+
+
+class GameWorld:
+    """
+    Holds the settings for the dungeon's floors, and every floor but the current one.
+    """
+    def __init__(
+        self,
+        *,
+        engine: Engine,
+        map_width: int,
+        map_height: int,
+        max_rooms: int,
+        room_min_size: int,
+        room_max_size: int,
+        max_monsters_per_room: int,
+        current_floor: int = 0,
+        packed_masks: bool = False,
+    ) -> None:
+        """
+        If `packed_masks` is True, floors keep their `visible` and `explored` masks
+        bit-packed while they are live too.
+        """
+        self.engine = engine
+
+        self.map_width = map_width
+        self.map_height = map_height
+
+        self.max_rooms = max_rooms
+
+        self.room_min_size = room_min_size
+        self.room_max_size = room_max_size
+
+        self.max_monsters_per_room = max_monsters_per_room
+
+        self.current_floor = current_floor
+        self.packed_masks = packed_masks
+        self.levels: Dict[int, FrozenLevel] = {}
+
+    def generate_floor(self) -> None:
+        """
+        Generate the current floor and put the player on it.
+        """
+        self.engine.game_map = generate_dungeon(
+            max_rooms=self.max_rooms,
+            room_min_size=self.room_min_size,
+            room_max_size=self.room_max_size,
+            map_width=self.map_width,
+            map_height=self.map_height,
+            max_monsters_per_room=self.max_monsters_per_room,
+            engine=self.engine,
+            up_stairs=self.current_floor > 0,
+            packed_masks=self.packed_masks,
+        )
+
+    def change_floor(self, floor: int) -> None:
+        """
+        Freeze the current floor, and move the player to another one.
+
+        The player arrives on the stairs leading back to the floor they came from.
+        A floor which was never visited is generated.
+        """
+        player = self.engine.player
+        going_down = floor > self.current_floor
+        self.levels[self.current_floor] = FrozenLevel.freeze(
+            self.engine.game_map, exclude={player}
+        )
+        self.current_floor = floor
+
+        level = self.levels.pop(floor, None)
+        if level is None:
+            self.generate_floor()
+            return
+
+        game_map = level.thaw(self.engine, self.packed_masks)
+        if going_down:
+            arrival = game_map.upstairs_location
+        else:
+            arrival = game_map.downstairs_location
+        player.place(*arrival, game_map)
+        self.engine.game_map = game_map
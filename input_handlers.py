@@ -4,7 +4,8 @@ from typing import Optional, TYPE_CHECKING
 
 import tcod.event
 
-from actions import Action, BumpAction, EscapeAction, WaitAction
+from actions import Action, BumpAction, EscapeAction, TakeStairsAction, WaitAction
+from auto_explore import auto_explore, auto_move, run_step
 
 if TYPE_CHECKING:
     from engine import Engine
@@ -48,7 +49,7 @@ class EventHandler(tcod.event.EventDispatch[Action]):
             self.dispatch(event)
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
-        if self.engine.game_map.in_bounds(event.tile.x, event.tile.y):
+        if self.engine.camera.in_viewport(event.tile.x, event.tile.y):
             self.engine.mouse_location = event.tile.x, event.tile.y
 
     def ev_quit(self, event: tcod.event.Quit) -> Optional[Action]:
@@ -67,17 +68,26 @@ class MainGameEventHandler(EventHandler):
             if action is None:
                 continue
 
-            action.perform()
-            self.engine.handle_enemy_turns()
-            self.engine.update_fov()
+            self.engine.take_turn(action)
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[Action]:
         action: Optional[Action] = None
 
         key = event.sym
+        modifier = event.mod
         player = self.engine.player
 
-        if key in MOVE_KEYS:
+        shift = modifier & (tcod.event.KMOD_LSHIFT | tcod.event.KMOD_RSHIFT)
+        if key == tcod.event.K_PERIOD and shift:
+            # ">"
+            action = TakeStairsAction(player, 1)
+        elif key == tcod.event.K_COMMA and shift:
+            # "<"
+            action = TakeStairsAction(player, -1)
+        elif key in MOVE_KEYS and shift:
+            # Run, taking every turn right here.
+            auto_move(self.engine, run_step(*MOVE_KEYS[key]))
+        elif key in MOVE_KEYS:
             dx, dy = MOVE_KEYS[key]
             action = BumpAction(player, dx, dy)
         elif key in WAIT_KEYS:
@@ -86,6 +96,14 @@ class MainGameEventHandler(EventHandler):
             action = EscapeAction(player)
         elif key == tcod.event.K_v:
             self.engine.event_handler = HistoryViewer(self.engine)
+        elif key == tcod.event.K_x:
+            auto_explore(self.engine)
+        elif key == tcod.event.K_F3:
+            # Toggle profiling, and its overlay.
+            self.engine.profiler.enabled = not self.engine.profiler.enabled
+        elif key == tcod.event.K_F4:
+            self.engine.profiler.export_json("profile.json")
+            self.engine.profiler.export_csv("profile.csv")
 
         return action
 
@@ -0,0 +1,198 @@
+"""
+A compact binary journal of every action performed during a session.
+
+Each record is a tag, the id of the acting entity, and the action's dx/dy.  Together
+with the seed the dungeon was generated from, the journal is enough to replay a
+whole session headless, as fast as the engine can run.
+"""
+from __future__ import annotations
+
+import pickle
+import random
+import struct
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from actions import Action, MeleeAttack, MovementAction, TakeStairsAction, WaitAction
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+MAGIC = b"TCJ1"
+HEADER = struct.Struct("<4sQI")  # magic, seed, player id
+RECORD = struct.Struct("<BIbb")  # tag, actor id, dx, dy
+
+# Record tags.
+WAIT = 0
+MOVE = 1
+MELEE = 2
+STAIRS = 3  # dy is the direction taken.
+
+TAGS = {
+    WaitAction: WAIT,
+    MovementAction: MOVE,
+    MeleeAttack: MELEE,
+    TakeStairsAction: STAIRS,
+}
+
+
+class ActionJournal:
+    def __init__(
+        self,
+        seed: int,
+        player_id: int,
+        data: bytes = b"",
+        snapshot_interval: int = 100,
+        max_snapshots: int = 10,
+        live_snapshots: bool = False,
+    ) -> None:
+        """
+        Snapshots are taken every `snapshot_interval` turns while replaying, and
+        while playing too if `live_snapshots` is True.  Only the `max_snapshots`
+        most recently taken are kept, a snapshot of a large level is megabytes.
+        """
+        self.seed = seed
+        self.player_id = player_id
+        self.data = bytearray(data)
+        self.snapshot_interval = snapshot_interval
+        self.max_snapshots = max_snapshots
+        self.live_snapshots = live_snapshots
+        # Pickled engines and random states, keyed by the number of turns completed
+        # when they were taken, oldest first.
+        self.snapshots: Dict[int, bytes] = {}
+        # Byte offset of each of the player's records.  Every turn starts with one.
+        self.turn_offsets: List[int] = [
+            offset
+            for offset in range(0, len(self.data), RECORD.size)
+            if RECORD.unpack_from(self.data, offset)[1] == player_id
+        ]
+
+    @property
+    def turns(self) -> int:
+        """
+        The number of player turns in this journal.
+        """
+        return len(self.turn_offsets)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, int]]:
+        """
+        Iterate over the (tag, actor id, dx, dy) records of this journal.
+        """
+        return RECORD.iter_unpack(self.data)
+
+    def record(self, action: Action) -> None:
+        """
+        Append an action to this journal.
+
+        This is called before the action is performed, so a player action marks the
+        end of the previous turn, which is when live snapshots are taken.
+        """
+        actor_id = action.entity.id
+        if actor_id == self.player_id:
+            if self.live_snapshots and self.turns % self.snapshot_interval == 0:
+                self.snapshot(action.engine)
+            self.turn_offsets.append(len(self.data))
+        if isinstance(action, TakeStairsAction):
+            dx, dy = 0, action.direction
+        else:
+            dx, dy = getattr(action, "dx", 0), getattr(action, "dy", 0)
+        self.data += RECORD.pack(TAGS[type(action)], actor_id, dx, dy)
+
+    def snapshot(self, engine: Engine, turn: Optional[int] = None) -> None:
+        """
+        Store a snapshot of the engine, as it is after `turn` turns, dropping the
+        oldest one if there are more than `max_snapshots`.
+
+        New floors are generated during the game, so the state of `random` is kept
+        along with the engine.
+        """
+        if turn is None:
+            turn = self.turns
+        journal, engine.journal = engine.journal, None
+        try:
+            self.snapshots.pop(turn, None)
+            self.snapshots[turn] = pickle.dumps(
+                (engine, random.getstate()), pickle.HIGHEST_PROTOCOL
+            )
+        finally:
+            engine.journal = journal
+        while len(self.snapshots) > self.max_snapshots:
+            del self.snapshots[next(iter(self.snapshots))]
+
+    def player_action(self, engine: Engine, turn: int) -> Action:
+        """
+        Rebuild the action the player took at the start of the given turn.
+        """
+        tag, _, dx, dy = RECORD.unpack_from(self.data, self.turn_offsets[turn])
+        if tag == MOVE:
+            return MovementAction(engine.player, dx, dy)
+        if tag == MELEE:
+            return MeleeAttack(engine.player, dx, dy)
+        if tag == STAIRS:
+            return TakeStairsAction(engine.player, dy)
+        return WaitAction(engine.player)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.seed, self.player_id))
+            f.write(self.data)
+
+    @classmethod
+    def load(cls, path: str) -> ActionJournal:
+        with open(path, "rb") as f:
+            magic, seed, player_id = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an action journal.")
+            return cls(seed, player_id, f.read())
+
+
+def replay(
+    journal: ActionJournal,
+    new_game: Callable[[int], Engine],
+    turn: Optional[int] = None,
+) -> Engine:
+    """
+    Replay a journal headless and return the engine as it was after `turn` turns.
+
+    Replay starts from the nearest snapshot at or before `turn`, or from a new game
+    built by `new_game(journal.seed)` if there is none.  Only the player's actions
+    are fed back in; everything else is reproduced by the engine itself.  Snapshots
+    are taken along the way, so seeking around the same session gets cheaper.
+    """
+    if turn is None:
+        turn = journal.turns
+    turn = max(0, min(turn, journal.turns))
+
+    start = max((t for t in journal.snapshots if t <= turn), default=None)
+    if start is None:
+        start = 0
+        engine = new_game(journal.seed)
+    else:
+        engine, random_state = pickle.loads(journal.snapshots[start])
+        random.setstate(random_state)
+    engine.journal = None
+
+    for current in range(start, turn):
+        due = current % journal.snapshot_interval == 0
+        if due and current not in journal.snapshots:
+            journal.snapshot(engine, current)
+        engine.take_turn(journal.player_action(engine, current))
+
+    return engine
+
+
+if __name__ == "__main__":
+    from main import new_game
+
+    def new_profiled_game(seed: int) -> Engine:
+        engine = new_game(seed)
+        engine.profiler.enabled = True
+        return engine
+
+    journal = ActionJournal.load(sys.argv[1])
+    start_time = time.perf_counter()
+    engine = replay(journal, new_profiled_game)
+    elapsed = time.perf_counter() - start_time
+    print(f"Replayed {journal.turns} turns in {elapsed:.3f}s.")
+    print("\n".join(engine.profiler.summary()))
@@ -0,0 +1,135 @@
+"""
+What generation knows about a level's layout, kept so that it doesn't have to be
+found again with searches.
+
+A layout holds the level's rooms, which rooms the tunnels join, and for every tile
+the room it belongs to, the connected region it is part of, and how many steps away
+the nearest room is.  Questions like "which room is this?" or "can this be reached
+from there?" are then array lookups.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+import tcod
+
+# The room id of tiles outside of every room.
+NO_ROOM = -1
+# The component label of tiles which can't be walked on.
+NO_COMPONENT = 0
+# The room distance of tiles no room can be reached from.
+UNREACHABLE = np.iinfo(np.uint16).max
+
+
+class LevelLayout:
+    def __init__(
+        self,
+        rooms: np.ndarray,
+        adjacency: np.ndarray,
+        room_ids: np.ndarray,
+        components: np.ndarray,
+        room_distance: np.ndarray,
+    ) -> None:
+        """
+        `rooms` holds the (x1, y1, x2, y2) of each room, `adjacency[a, b]` is True
+        if a tunnel joins rooms a and b.  The per-tile arrays are `room_ids`,
+        `components`, labelled from 1, and `room_distance`.
+        """
+        self.rooms = rooms
+        self.adjacency = adjacency
+        self.room_ids = room_ids
+        self.components = components
+        self.room_distance = room_distance
+
+    @classmethod
+    def build(
+        cls,
+        walkable: np.ndarray,
+        rooms: Sequence[Tuple[int, int, int, int]],
+        tunnels: Iterable[List[Tuple[int, int]]],
+    ) -> LevelLayout:
+        """
+        Work out the layout of a freshly generated level.
+
+        `rooms` are the rectangles of the rooms, whose inner tiles belong to them,
+        and `tunnels` the tiles of each tunnel which was dug, in order.
+        """
+        room_array = np.array(rooms, dtype=np.int32).reshape(-1, 4)
+        room_ids = _room_ids(walkable.shape, room_array)
+
+        # A tunnel joins the rooms it goes through one after the other, not only
+        # the two it was dug between.
+        adjacency = np.zeros((len(room_array), len(room_array)), dtype=bool)
+        for tunnel in tunnels:
+            if not tunnel:
+                continue
+            xs, ys = np.array(tunnel).T
+            passed = room_ids[xs, ys]
+            passed = passed[passed != NO_ROOM]
+            passed = passed[np.flatnonzero(np.diff(passed, prepend=NO_ROOM))]
+            adjacency[passed[:-1], passed[1:]] = True
+            adjacency[passed[1:], passed[:-1]] = True
+
+        return cls.from_rooms(walkable, room_array, adjacency)
+
+    @classmethod
+    def from_rooms(
+        cls, walkable: np.ndarray, rooms: np.ndarray, adjacency: np.ndarray
+    ) -> LevelLayout:
+        """
+        Work out the per-tile arrays of a layout from its rooms and the level's
+        walkable tiles.
+        """
+        room_ids = _room_ids(walkable.shape, rooms)
+        cost = walkable.astype(np.int8)
+        components = np.full(walkable.shape, NO_COMPONENT, dtype=np.int32, order="F")
+        label = NO_COMPONENT
+        unlabelled = np.flatnonzero(walkable.ravel(order="F"))
+        while unlabelled.size:
+            label += 1
+            seed = np.unravel_index(unlabelled[0], walkable.shape, order="F")
+            distance = tcod.path.maxarray(walkable.shape, dtype=np.int32, order="F")
+            distance[seed] = 0
+            tcod.path.dijkstra2d(distance, cost, 1, 1, out=distance)
+            components[distance != np.iinfo(np.int32).max] = label
+            labels = components.ravel(order="F")[unlabelled]
+            unlabelled = unlabelled[labels == NO_COMPONENT]
+
+        distance = tcod.path.maxarray(walkable.shape, dtype=np.int32, order="F")
+        distance[room_ids != NO_ROOM] = 0
+        tcod.path.dijkstra2d(distance, cost, 1, 1, out=distance)
+        room_distance = np.asfortranarray(
+            np.minimum(distance, UNREACHABLE).astype(np.uint16)
+        )
+
+        return cls(rooms, adjacency, room_ids, components, room_distance)
+
+    def room_at(self, x: int, y: int) -> int:
+        """
+        Return the id of the room at (x, y), or `NO_ROOM`.
+        """
+        return int(self.room_ids[x, y])
+
+    def neighbors(self, room_id: int) -> List[int]:
+        """
+        Return the ids of the rooms a tunnel leads to from the given room.
+        """
+        return np.flatnonzero(self.adjacency[room_id]).tolist()
+
+    def connected(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        """
+        Return True if there is a walkable path between two positions.
+        """
+        label = self.components[a]
+        return bool(label != NO_COMPONENT and label == self.components[b])
+
+
+def _room_ids(shape: Tuple[int, int], rooms: np.ndarray) -> np.ndarray:
+    """
+    Return the id of the room each tile belongs to, or `NO_ROOM`.
+    """
+    room_ids = np.full(shape, NO_ROOM, dtype=np.int16, order="F")
+    for room_id, (x1, y1, x2, y2) in enumerate(rooms.tolist()):
+        room_ids[x1 + 1 : x2, y1 + 1 : y2] = room_id
+    return room_ids
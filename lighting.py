@@ -0,0 +1,110 @@
+"""
+Light cast by entities, such as torches and glowing monsters.
+
+Each light source lights the tiles it can see, fading with distance.  The light of
+sources which don't move is cached until the map's tiles change, the light of actors
+is recomputed each frame.  The light of every source is summed into one array, which
+brightens and tints the colors of the visible tiles it falls on.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+from tcod.map import compute_fov
+
+from entity import Actor
+
+if TYPE_CHECKING:
+    from entity import Entity
+    from game_map import GameMap
+
+# A light source: x, y, radius and color.
+LightKey = Tuple[int, int, int, Tuple[int, int, int]]
+
+# Where a light falls on the map, and its RGB intensity there.
+LightPatch = Tuple[Tuple[slice, slice], np.ndarray]
+
+
+def light_key(entity: Entity) -> LightKey:
+    return entity.x, entity.y, entity.light_radius, entity.light_color
+
+
+def cast_light(transparent: np.ndarray, key: LightKey) -> LightPatch:
+    """
+    Return the light cast by a source, given the map's transparent tiles.
+    """
+    x, y, radius, light_color = key
+    x1, y1 = max(0, x - radius), max(0, y - radius)
+    transparent = transparent[x1 : x + radius + 1, y1 : y + radius + 1]
+    window = (
+        slice(x1, x1 + transparent.shape[0]),
+        slice(y1, y1 + transparent.shape[1]),
+    )
+    lit = compute_fov(transparent, (x - x1, y - y1), radius=radius, light_walls=True)
+
+    dx = np.arange(x1, x1 + transparent.shape[0]) - x
+    dy = np.arange(y1, y1 + transparent.shape[1]) - y
+    distance = np.hypot(dx[:, np.newaxis], dy[np.newaxis, :])
+    falloff = np.clip(1 - distance / (radius + 1), 0, 1) ** 2 * lit
+
+    rgb = np.asarray(light_color, dtype=np.float32) / 255
+    return window, falloff[..., np.newaxis].astype(np.float32) * rgb
+
+
+class Lighting:
+    def __init__(self, game_map: GameMap) -> None:
+        self.game_map = game_map
+        # Light cast by the sources which aren't actors, by source, and the map's
+        # `cost_version` when it was cast.
+        self.static_lights: Dict[LightKey, LightPatch] = {}
+        self.static_version = game_map.cost_version
+
+    def light(self, window: Tuple[slice, slice]) -> Optional[np.ndarray]:
+        """
+        Return the light over a window of the map, as an array of RGB intensities.
+
+        Return None if no light falls on the window.
+        """
+        game_map = self.game_map
+        if self.static_version != game_map.cost_version:
+            # The tiles changed, light may now go through or stop at other tiles.
+            self.static_lights.clear()
+            self.static_version = game_map.cost_version
+        static_keys = set()
+        dynamic_keys = []
+        for entity in game_map.entities:
+            if entity.light_radius <= 0:
+                continue
+            if isinstance(entity, Actor):
+                dynamic_keys.append(light_key(entity))
+            else:
+                static_keys.add(light_key(entity))
+
+        # Forget the static lights which were removed or moved.
+        for key in self.static_lights.keys() - static_keys:
+            del self.static_lights[key]
+
+        transparent = game_map.tiles["transparent"]
+        for key in static_keys - self.static_lights.keys():
+            self.static_lights[key] = cast_light(transparent, key)
+
+        patches = list(self.static_lights.values())
+        patches.extend(cast_light(transparent, key) for key in dynamic_keys)
+
+        x1, x2 = window[0].start, window[0].stop
+        y1, y2 = window[1].start, window[1].stop
+        light: Optional[np.ndarray] = None
+        for (patch_x, patch_y), patch in patches:
+            # The overlap of the patch and the window.
+            left, right = max(x1, patch_x.start), min(x2, patch_x.stop)
+            top, bottom = max(y1, patch_y.start), min(y2, patch_y.stop)
+            if left >= right or top >= bottom:
+                continue
+            if light is None:
+                light = np.zeros((x2 - x1, y2 - y1, 3), dtype=np.float32, order="F")
+            light[left - x1 : right - x1, top - y1 : bottom - y1] += patch[
+                left - patch_x.start : right - patch_x.start,
+                top - patch_y.start : bottom - patch_y.start,
+            ]
+        return light
@@ -1,60 +1,186 @@
+from __future__ import annotations
+
+import time
+
+# Taken before anything heavy is imported, to report the time to the first frame.
+START_TIME = time.perf_counter()
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import copy
+import logging
+import os
+import random
+from typing import Optional, TYPE_CHECKING
 
 import tcod
 
 import color
-from engine import Engine
-import entity_factories
-from procgen import generate_dungeon
 
-def main() -> None:
-    screen_width = 80
-    screen_height = 50
+if TYPE_CHECKING:
+    from engine import Engine
+    from frame_diff import FrameRecorder
+
+SAVE_PATH = "savegame"
+
+logger = logging.getLogger(__name__)
+
+def new_game(
+    seed: int,
+    map_width: int = 80,
+    map_height: int = 43,
+    max_rooms: int = 30,
+    max_monsters_per_room: int = 2,
+    packed_masks: bool = False,
+) -> Engine:
+    """
+    Return a brand new game, generated from the given seed.
+
+    `packed_masks` keeps the maps' `visible` and `explored` masks bit-packed, which
+    is worth it for very large maps.
+    """
+    # The rest of the game is imported here, so that the window can open first.
+    from engine import Engine
+    import entity_factories
+    from game_world import GameWorld
 
-    map_width = 80
-    map_height = 43
     room_max_size = 10
     room_min_size = 6
-    max_rooms = 30
-    max_monsters_per_room = 2
 
-    tileset = tcod.tileset.load_tilesheet(
-        "dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD
-    )
+    random.seed(seed)
 
     player = copy.deepcopy(entity_factories.player)
-    engine = Engine(player=player)
+    engine = Engine(player=player, seed=seed)
 
-    engine.game_map = generate_dungeon(
+    engine.game_world = GameWorld(
+        engine=engine,
         max_rooms=max_rooms,
         room_min_size=room_min_size,
         room_max_size=room_max_size,
         map_width=map_width,
         map_height=map_height,
         max_monsters_per_room=max_monsters_per_room,
-        engine=engine,
+        packed_masks=packed_masks,
     )
+    engine.game_world.generate_floor()
     engine.update_fov()
     engine.message_log.add_message(
         "Hello and welcome adventurer!", color.welcome_text
     )
 
+    return engine
+
+
+def load_or_new_game() -> Engine:
+    """
+    Continue the saved game if there is one, or start a new one.
+
+    A save which can't be loaded, such as one from an older version of the game, is
+    moved aside to `SAVE_PATH + ".old"` so that a new game can be saved.
+    """
+    if os.path.exists(os.path.join(SAVE_PATH, "engine.json")):
+        from savegame import load_game
+
+        try:
+            return load_game(SAVE_PATH)
+        except (ValueError, KeyError, OSError) as error:
+            import shutil
+
+            logger.warning("Could not load the saved game, starting anew: %s", error)
+            shutil.rmtree(SAVE_PATH + ".old", ignore_errors=True)
+            os.replace(SAVE_PATH, SAVE_PATH + ".old")
+    return new_game(seed=random.getrandbits(32))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Roguelike Tutorial")
+    parser.add_argument(
+        "--record-frames",
+        metavar="PATH",
+        help="Record the session to PATH, to play back with frame_diff.py.",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Log the startup timings.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(levelname)s: %(message)s",
+    )
+
+    screen_width = 80
+    screen_height = 50
+
+    # The first level is made in the background, while the window opens.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future_engine = executor.submit(load_or_new_game)
 
+        tileset = tcod.tileset.load_tilesheet(
+            "dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD
+        )
 
-    with tcod.context.new_terminal(
-        screen_width,
-        screen_height,
-        tileset=tileset,
-        title="Roguelike Tutorial",
-        vsync=True,
-    ) as context:
-        root_console = tcod.Console(screen_width, screen_height, order="F")
+        with tcod.context.new_terminal(
+            screen_width,
+            screen_height,
+            tileset=tileset,
+            title="Roguelike Tutorial",
+            vsync=True,
+        ) as context:
+            root_console = tcod.Console(screen_width, screen_height, order="F")
 
-        while True:
-            root_console.clear()
-            engine.event_handler.on_render(console=root_console)
+            root_console.print(
+                screen_width // 2,
+                screen_height // 2,
+                "Loading...",
+                fg=color.white,
+                alignment=tcod.CENTER,
+            )
             context.present(root_console)
-            engine.event_handler.handle_events(context)
+            first_frame_time = time.perf_counter() - START_TIME
+
+            while not future_engine.done():
+                for event in tcod.event.wait(timeout=0.01):
+                    if isinstance(event, tcod.event.Quit):
+                        raise SystemExit()
+            engine = future_engine.result()
+
+            logger.info(
+                "First frame after %.0f ms, first turn after %.0f ms.",
+                first_frame_time * 1000,
+                (time.perf_counter() - START_TIME) * 1000,
+            )
+
+            recorder: Optional[FrameRecorder] = None
+            if args.record_frames:
+                from frame_diff import FrameRecorder
+
+                recorder = FrameRecorder(args.record_frames)
+            try:
+                while True:
+                    root_console.clear()
+                    engine.event_handler.on_render(console=root_console)
+                    context.present(root_console)
+                    if recorder:
+                        recorder.record(root_console)
+                    engine.event_handler.handle_events(context)
+            finally:
+                if recorder:
+                    recorder.close()
+                # Keep the last session around, it can be replayed with journal.py.
+                if engine.journal is not None:
+                    engine.journal.save("last_session.journal")
+                if engine.player.is_alive:
+                    from savegame import save_game
+
+                    save_game(engine, SAVE_PATH)
+                elif os.path.exists(SAVE_PATH):
+                    import shutil
+
+                    # Death is permanent.
+                    shutil.rmtree(SAVE_PATH)
 
 
 if __name__ == "__main__":
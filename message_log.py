@@ -27,18 +27,25 @@ class MessageLog:
         self.messages: List[Message] = []
 
     def add_message(
-        self, text:str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True
+        self,
+        text:str,
+        fg: Tuple[int, int, int] = color.white,
+        *,
+        stack: bool = True,
+        count: int = 1,
     ) -> None:
         """
         Add a message to this log.
         `text` is the message text, `fg` is the text color.
         If `stack` is True, then the message can stack with a previous message of the
         same text.
+        `count` is the number of times the message is added.
         """
         if stack and self.messages and text == self.messages[-1].plain_text:
-            self.messages[-1].count += 1
+            self.messages[-1].count += count
         else:
             self.messages.append(Message(text, fg))
+            self.messages[-1].count = count
 
     def render(
         self, console: tcod.Console, x: int, y:int, width: int, height:int
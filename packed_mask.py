@@ -0,0 +1,125 @@
+"""
+A boolean mask stored as one bit per tile, for the `visible` and `explored` arrays of
+large maps.
+
+It indexes like the 2D bool array it replaces, with an (x, y) position or a region of
+slices, so the rest of the game does not need to know the difference.  Reading a
+region only unpacks the bytes under it, and whole masks combine with `|` and `&`
+one byte, so eight tiles, at a time.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+# The number of bits set in each byte value.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class PackedMask:
+    def __init__(
+        self, width: int, height: int, bits: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        `bits` may be given when restoring a mask.  Bits are packed along x, lowest
+        bit first: byte [i, y] holds the tiles from (8 * i, y) to (8 * i + 7, y).
+        """
+        self.width = width
+        self.height = height
+        if bits is None:
+            bits = np.zeros(((width + 7) // 8, height), dtype=np.uint8, order="F")
+        self.bits = bits
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> PackedMask:
+        width, height = array.shape
+        return cls(
+            width,
+            height,
+            np.asfortranarray(np.packbits(array, axis=0, bitorder="little")),
+        )
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def _region(self, key: Tuple[slice, slice]) -> Tuple[int, int, int, int]:
+        """
+        Return the corners of the region indexed by a pair of slices.
+        """
+        x1, x2, x_step = key[0].indices(self.width)
+        y1, y2, y_step = key[1].indices(self.height)
+        if x_step != 1 or y_step != 1:
+            raise IndexError("PackedMask only supports slices with a step of 1.")
+        return x1, max(x1, x2), y1, max(y1, y2)
+
+    def __getitem__(self, key: Tuple[Any, Any]) -> Any:
+        x, y = key
+        if not isinstance(x, slice):
+            return bool((self.bits[x >> 3, y] >> (x & 7)) & 1)
+
+        x1, x2, y1, y2 = self._region(key)
+        byte1, byte2 = x1 >> 3, (x2 + 7) >> 3
+        unpacked = np.unpackbits(
+            self.bits[byte1:byte2, y1:y2], axis=0, bitorder="little"
+        )
+        return unpacked[x1 - byte1 * 8 : x2 - byte1 * 8].astype(bool)
+
+    def __setitem__(self, key: Tuple[Any, Any], value: Any) -> None:
+        x, y = key
+        if not isinstance(x, slice):
+            if value:
+                self.bits[x >> 3, y] |= 1 << (x & 7)
+            else:
+                self.bits[x >> 3, y] &= ~np.uint8(1 << (x & 7))
+            return
+
+        x1, x2, y1, y2 = self._region(key)
+        if x1 == x2 or y1 == y2:
+            return
+        # Bytes at the edges of the region hold tiles outside of it, so unpack them
+        # and pack them back.
+        byte1, byte2 = x1 >> 3, (x2 + 7) >> 3
+        unpacked = np.unpackbits(
+            self.bits[byte1:byte2, y1:y2], axis=0, bitorder="little"
+        )
+        unpacked[x1 - byte1 * 8 : x2 - byte1 * 8] = value
+        self.bits[byte1:byte2, y1:y2] = np.packbits(
+            unpacked, axis=0, bitorder="little"
+        )
+
+    def or_region(self, other: PackedMask, key: Tuple[slice, slice]) -> None:
+        """
+        Set the tiles of a region which are set in `other`, without unpacking.
+        """
+        x1, x2, y1, y2 = self._region(key)
+        if x1 == x2 or y1 == y2:
+            return
+        byte1, byte2 = x1 >> 3, (x2 + 7) >> 3
+        bits = other.bits[byte1:byte2, y1:y2].copy()
+        # Leave out the tiles of the edge bytes which are outside of the region.
+        bits[0] &= np.uint8((0xFF << (x1 & 7)) & 0xFF)
+        if x2 & 7:
+            bits[-1] &= np.uint8(0xFF >> (8 - (x2 & 7)))
+        self.bits[byte1:byte2, y1:y2] |= bits
+
+    def __or__(self, other: PackedMask) -> PackedMask:
+        return PackedMask(self.width, self.height, self.bits | other.bits)
+
+    def __and__(self, other: PackedMask) -> PackedMask:
+        return PackedMask(self.width, self.height, self.bits & other.bits)
+
+    def __ior__(self, other: PackedMask) -> PackedMask:
+        self.bits |= other.bits
+        return self
+
+    def __iand__(self, other: PackedMask) -> PackedMask:
+        self.bits &= other.bits
+        return self
+
+    def count(self) -> int:
+        """
+        Return the number of tiles set.
+        """
+        return int(_POPCOUNT[self.bits].sum(dtype=np.int64))
@@ -0,0 +1,104 @@
+"""
+Paths for the actors about to act, searched in parallel ahead of their turns.
+
+The searches run in C, in a thread pool, over one read-only snapshot of the path
+cost taken at the start of the phase.  Each path is then handed to its actor, which
+uses it on its turn.  Since the snapshot is taken before anyone moves and the
+results are handed out by actor, the paths don't depend on how the threads were
+scheduled.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from components.ai import PATH_MARGIN, BaseAI, path_cost, path_window, search_path
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+    from game_map import GameMap
+
+# Below this many searches, threads cost more than they save.
+MIN_PARALLEL_SEARCHES = 4
+
+# Shared by every engine, and created on first use.  It isn't kept on the engine,
+# which has to stay picklable.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count(), thread_name_prefix="path_planning"
+        )
+    return _executor
+
+
+def plan_paths(engine: Engine, actors: Iterable[Actor]) -> None:
+    """
+    Search the paths the given actors will need on their turns.
+
+    An actor whose path wasn't found within the first search window is left to
+    widen the search itself.
+    """
+    ais: List[BaseAI] = []
+    ends: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
+    for actor in actors:
+        if actor.ai:
+            dest = actor.ai.path_request()
+            if dest is not None:
+                ais.append(actor.ai)
+                ends.append(((actor.x, actor.y), dest))
+    if not ends:
+        return
+
+    paths = search_paths(engine.game_map, ends)
+    engine.profiler.count("path_searches", len(ends))
+    for ai, path in zip(ais, paths):
+        if path:
+            ai.planned_path = path
+
+
+def search_paths(
+    game_map: GameMap,
+    ends: List[Tuple[Tuple[int, int], Tuple[int, int]]],
+    parallel: Optional[bool] = None,
+) -> List[List[Tuple[int, int]]]:
+    """
+    Return the path between each (start, dest) pair, searched within `PATH_MARGIN`.
+
+    The searches run in the thread pool if `parallel` is True, inline if it is
+    False, and by default in the pool once there are `MIN_PARALLEL_SEARCHES`.
+    """
+    windows = [
+        path_window(start, dest, PATH_MARGIN, game_map.width, game_map.height)
+        for start, dest in ends
+    ]
+    x1 = min(window[0] for window in windows)
+    y1 = min(window[1] for window in windows)
+    x2 = max(window[2] for window in windows)
+    y2 = max(window[3] for window in windows)
+    cost = path_cost(game_map, x1, y1, x2, y2)
+    cost.flags.writeable = False
+
+    def search(
+        end: Tuple[Tuple[int, int], Tuple[int, int]],
+        window: Tuple[int, int, int, int],
+    ) -> List[Tuple[int, int]]:
+        start, dest = end
+        window_x1, window_y1, window_x2, window_y2 = window
+        return search_path(
+            cost[window_x1 - x1 : window_x2 - x1, window_y1 - y1 : window_y2 - y1],
+            (window_x1, window_y1),
+            start,
+            dest,
+        )
+
+    if parallel is None:
+        parallel = len(ends) >= MIN_PARALLEL_SEARCHES
+    if parallel:
+        return list(get_executor().map(search, ends, windows))
+    return [search(end, window) for end, window in zip(ends, windows)]
@@ -3,11 +3,13 @@ from __future__ import annotations
 import random
 from typing import Iterator, List, Tuple, TYPE_CHECKING
 
+import numpy as np
 import tcod
 from tcod.libtcodpy import console_rect
 
 import entity_factories
 from game_map import GameMap
+from level_layout import LevelLayout
 import tile_types
 
 if TYPE_CHECKING:
@@ -56,16 +58,29 @@ def generate_dungeon(
     map_height: int,
     max_monsters_per_room: int,
     engine: Engine,
+    up_stairs: bool = False,
+    packed_masks: bool = False,
 ) -> GameMap:
     """
     Generate a new dungeon map.
     Map is generated by creating non-intersecting rooms, then connecting them with
     tunnels.
+
+    Stairs down are put in the center of the last room.  If `up_stairs` is True,
+    stairs up are put where the player starts.
+
+    The rooms and tunnels are kept in the map's `layout`.
     """
     player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    dungeon = GameMap(
+        engine, map_width, map_height, entities=[player], packed_masks=packed_masks
+    )
 
     rooms: List[RectangularRoom] = []
+    tunnels: List[List[Tuple[int, int]]] = []
+    # Draws whole batches of numbers at once, seeded from `random` so that the
+    # dungeon still only depends on the game's seed.
+    rng = np.random.default_rng(random.getrandbits(64))
 
     for r in range(max_rooms):
         room_width = random.randint(room_min_size, room_max_size)
@@ -79,39 +94,61 @@ def generate_dungeon(
         if any(new_room.intersects(other_room) for other_room in rooms):
             continue
 
-        dungeon.tiles[new_room.inner] = tile_types.floor
+        dungeon.set_tiles(new_room.inner, tile_types.floor)
+
+        place_entities(new_room, dungeon, max_monsters_per_room, rng)
 
-        place_entities(new_room, dungeon, max_monsters_per_room)
+        # Light every third room, in its corner, so the dungeon stays mostly dark.
+        if len(rooms) % 3 == 1:
+            entity_factories.torch.spawn(dungeon, new_room.x1 + 1, new_room.y1 + 1)
 
 
         if len(rooms) == 0:
             player.place(*new_room.center, dungeon)
         else:
-            for x, y, in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+            tunnel = list(tunnel_between(rooms[-1].center, new_room.center))
+            for x, y, in tunnel:
+                dungeon.set_tiles((x, y), tile_types.floor)
+            tunnels.append(tunnel)
 
         rooms.append(new_room)
 
+    dungeon.downstairs_location = rooms[-1].center
+    dungeon.set_tiles(dungeon.downstairs_location, tile_types.down_stairs)
+    if up_stairs:
+        dungeon.upstairs_location = rooms[0].center
+        dungeon.set_tiles(dungeon.upstairs_location, tile_types.up_stairs)
+
+    dungeon.set_layout(
+        LevelLayout.build(
+            dungeon.tiles["walkable"],
+            [(room.x1, room.y1, room.x2, room.y2) for room in rooms],
+            tunnels,
+        )
+    )
     return dungeon
 
 def place_entities(
     room: RectangularRoom,
     dungeon: GameMap,
     maximum_monsters: int,
+    rng: np.random.Generator,
 ) -> None:
     """
     Place entities in a given room.
+
+    The kind and position of every monster of the room are drawn at once, kinds in
+    proportion to their spawn weights.
     """
     number_of_monsters = random.randint(0, maximum_monsters)
-    for i in range(number_of_monsters):
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+    monsters = entity_factories.monster_table()
+    kinds = monsters.sample(rng, number_of_monsters)
+    xs = rng.integers(room.x1 + 1, room.x2, size=number_of_monsters)
+    ys = rng.integers(room.y1 + 1, room.y2, size=number_of_monsters)
 
+    for kind, x, y in zip(kinds.tolist(), xs.tolist(), ys.tolist()):
         if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            if random.random() < 0.8:
-                entity_factories.orc.spawn(dungeon, x, y)
-            else:
-                entity_factories.troll.spawn(dungeon, x, y)
+            monsters.spawn(kind, dungeon, x, y)
 
 
 def tunnel_between(
@@ -0,0 +1,144 @@
+"""
+Timers and counters for the phases of the game loop.
+
+Timing is done with `time.perf_counter`, and the last `window` samples of each phase
+are kept to compute rolling percentiles.  While the profiler is disabled, `phase`
+returns a shared do-nothing timer, so leaving the instrumentation in place costs a
+method call per phase.
+"""
+from __future__ import annotations
+
+from collections import Counter, deque
+import csv
+import json
+import time
+from typing import Any, Deque, Dict, List, Optional, Type, TYPE_CHECKING
+
+import numpy as np
+
+import color
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from tcod import Console
+
+PERCENTILES = (50, 95, 99)
+
+
+class PhaseTimer:
+    """
+    Context manager which times one phase and records the sample.
+    """
+    def __init__(self, window: int) -> None:
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        elapsed = time.perf_counter() - self.start
+        self.samples.append(elapsed)
+        self.count += 1
+        self.total += elapsed
+
+
+class NullTimer:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class Profiler:
+    def __init__(self, window: int = 512, enabled: bool = False) -> None:
+        self.window = window
+        self.enabled = enabled
+        self.timers: Dict[str, PhaseTimer] = {}
+        self.counters: Counter[str] = Counter()
+
+    def phase(self, name: str) -> Any:
+        """
+        Return a context manager timing the phase called `name`.
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = PhaseTimer(self.window)
+        return timer
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] += amount
+
+    def reset(self) -> None:
+        self.timers.clear()
+        self.counters.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return the count, total and rolling percentiles of each phase, in seconds.
+        """
+        stats = {}
+        for name, timer in sorted(self.timers.items()):
+            samples = np.fromiter(timer.samples, dtype=np.float64)
+            phase = {"count": timer.count, "total": timer.total}
+            values = np.percentile(samples, PERCENTILES)
+            for percentile, value in zip(PERCENTILES, values):
+                phase[f"p{percentile}"] = float(value)
+            phase["max"] = float(samples.max())
+            stats[name] = phase
+        return stats
+
+    def export_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(
+                {"phases": self.stats(), "counters": dict(self.counters)}, f, indent=2
+            )
+
+    def export_csv(self, path: str) -> None:
+        """
+        Write one row per phase, and one per counter with only a count.
+        """
+        columns = ["count", "total"] + [f"p{p}" for p in PERCENTILES] + ["max"]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name"] + columns)
+            for name, phase in self.stats().items():
+                writer.writerow([name] + [phase[column] for column in columns])
+            for name, count in sorted(self.counters.items()):
+                writer.writerow([name, count] + [""] * (len(columns) - 1))
+
+    def summary(self) -> List[str]:
+        """
+        Return a line of text per phase and counter, with times in milliseconds.
+        """
+        lines = [f"{'phase':<20}{'count':>8}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for name, phase in self.stats().items():
+            lines.append(
+                f"{name:<20}{phase['count']:>8}"
+                + "".join(f"{phase[f'p{p}'] * 1000:>8.2f}" for p in PERCENTILES)
+            )
+        for name, count in sorted(self.counters.items()):
+            lines.append(f"{name:<20}{count:>8}")
+        return lines
+
+    def render(self, console: Console, x: int = 0, y: int = 0) -> None:
+        """
+        Draw the summary as an overlay.
+        """
+        for i, line in enumerate(self.summary()):
+            console.print(x=x, y=y + i, string=line, fg=color.white, bg=color.black)
@@ -42,7 +42,8 @@ def render_names_at_mouse_location(
     y: int,
     engine: Engine,
 ) -> None:
-    mouse_x, mouse_y = engine.mouse_location
+    # The camera may have moved since the mouse did, so translate it every time.
+    mouse_x, mouse_y = engine.camera.screen_to_map(*engine.mouse_location)
 
     names_at_mouse_location = get_names_at_location(
         x=mouse_x, y=mouse_y, game_map=engine.game_map
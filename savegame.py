@@ -0,0 +1,363 @@
+"""
+Save and load games as raw NumPy buffers.
+
+A save is a directory.  Each level gets its own subdirectory holding its `tiles`,
+`visible` and `explored` arrays, the arrays of its layout, plus a structured array
+with one row per entity.  All of them are plain `.npy` files, so they can be
+memory-mapped with `np.load(mmap_mode=...)`.  The values of the level's scent and
+noise fields are saved alongside.  Frozen levels are saved in their frozen form,
+with their layout compressed.  Everything else goes into a small `engine.json`.
+
+Levels which have not changed since they were last saved are not written again.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from chunked_map import ChunkedGameMap
+from engine import Engine
+from entity import Actor, Entity
+from entity_table import pack_entities, unpack_entities
+from fields import noise_field, scent_field
+from game_map import GameMap
+from game_world import FrozenLevel, GameWorld
+from input_handlers import GameOverEventHandler
+from journal import ActionJournal
+from level_layout import LevelLayout
+from message_log import Message
+from packed_mask import PackedMask
+
+SAVE_VERSION = 4
+
+# The arrays of a LevelLayout, by the name of its attribute.
+LAYOUT_ARRAYS = ("rooms", "adjacency", "room_ids", "components", "room_distance")
+
+
+def _save_array(path: str, array: np.ndarray) -> None:
+    """
+    Write an array, replacing any previous file only once it is complete.
+    """
+    with open(f"{path}.tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(f"{path}.tmp", path)
+
+
+def save_level(game_map: GameMap, path: str) -> None:
+    """
+    Write a level to the directory at `path`, unless it was saved there already.
+    """
+    if not game_map.dirty and os.path.isdir(path):
+        return
+    os.makedirs(path, exist_ok=True)
+
+    if isinstance(game_map, ChunkedGameMap):
+        # The chunks already live on disk, only the ones in memory need writing.
+        game_map.flush()
+        with open(os.path.join(path, "chunks.json"), "w") as f:
+            json.dump(
+                {
+                    "width": game_map.width,
+                    "height": game_map.height,
+                    "path": os.path.abspath(game_map.path),
+                    "chunk_size": game_map.chunk_size,
+                    "max_chunks": game_map.max_chunks,
+                },
+                f,
+            )
+    else:
+        _save_array(os.path.join(path, "tiles.npy"), game_map.tiles)
+        for name in ("visible", "explored"):
+            mask = getattr(game_map, name)
+            if isinstance(mask, PackedMask):
+                mask = mask.bits
+            _save_array(os.path.join(path, f"{name}.npy"), mask)
+    _save_array(os.path.join(path, "scent.npy"), game_map.scent.values)
+    _save_array(os.path.join(path, "noise.npy"), game_map.noise.values)
+    if game_map.layout:
+        for name in LAYOUT_ARRAYS:
+            _save_array(
+                os.path.join(path, f"layout_{name}.npy"),
+                getattr(game_map.layout, name),
+            )
+    _save_array(
+        os.path.join(path, "entities.npy"),
+        pack_entities(sorted(game_map.entities, key=lambda entity: entity.id)),
+    )
+    _save_level_info(
+        path,
+        frozen=False,
+        width=game_map.width,
+        height=game_map.height,
+        downstairs_location=game_map.downstairs_location,
+        upstairs_location=game_map.upstairs_location,
+        scent_origin=game_map.scent.origin,
+        noise_origin=game_map.noise.origin,
+        packed_masks=game_map.packed_masks,
+        layout=game_map.layout is not None,
+    )
+    game_map.dirty = False
+
+
+def save_frozen_level(level: FrozenLevel, path: str) -> None:
+    """
+    Write a frozen level to the directory at `path`, unless it was saved there already.
+    """
+    if not level.dirty and os.path.isdir(path):
+        return
+    os.makedirs(path, exist_ok=True)
+
+    _save_array(os.path.join(path, "tile_ids.npy"), level.tile_ids)
+    _save_array(os.path.join(path, "explored_bits.npy"), level.explored_bits)
+    _save_array(os.path.join(path, "entities.npy"), level.entities)
+    if level.layout:
+        with open(os.path.join(path, "layout.npz.tmp"), "wb") as f:
+            np.savez_compressed(
+                f, **{name: getattr(level.layout, name) for name in LAYOUT_ARRAYS}
+            )
+        os.replace(
+            os.path.join(path, "layout.npz.tmp"), os.path.join(path, "layout.npz")
+        )
+    _save_level_info(
+        path,
+        frozen=True,
+        width=level.width,
+        height=level.height,
+        downstairs_location=level.downstairs_location,
+        upstairs_location=level.upstairs_location,
+        layout=level.layout is not None,
+    )
+    level.dirty = False
+
+
+def _save_level_info(path: str, **info: object) -> None:
+    """
+    Write what is left to know about a level, which form it is saved in and where
+    its stairs are.
+    """
+    with open(os.path.join(path, "level.json"), "w") as f:
+        json.dump(info, f)
+
+
+def _load_level_info(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, "level.json")) as f:
+        info: Dict[str, Any] = json.load(f)
+    for key in ("downstairs_location", "upstairs_location"):
+        if info[key] is not None:
+            info[key] = tuple(info[key])
+    return info
+
+
+def read_entities(path: str) -> List[Entity]:
+    """
+    Read the entities of the level saved in the directory at `path`.
+    """
+    return unpack_entities(np.load(os.path.join(path, "entities.npy")))
+
+
+def load_level(
+    engine: Engine,
+    path: str,
+    mmap_mode: Optional[str] = None,
+    entities: Optional[List[Entity]] = None,
+) -> GameMap:
+    """
+    Read a level from the directory at `path`.
+
+    Pass `mmap_mode="c"` to map the arrays copy-on-write instead of reading them.
+    `entities` may be given if they were already read with `read_entities`.
+
+    A chunked map is reopened on its chunk directory.  Its chunk generator can't be
+    saved, so set `generate` again on the result if parts of it were never visited.
+    """
+    info = _load_level_info(path)
+    width, height = info["width"], info["height"]
+    scent = scent_field(
+        width,
+        height,
+        tuple(info["scent_origin"]),
+        np.load(os.path.join(path, "scent.npy")),
+    )
+    noise = noise_field(
+        width,
+        height,
+        tuple(info["noise_origin"]),
+        np.load(os.path.join(path, "noise.npy")),
+    )
+
+    game_map: GameMap
+    if os.path.exists(os.path.join(path, "chunks.json")):
+        with open(os.path.join(path, "chunks.json")) as f:
+            chunks = json.load(f)
+        game_map = ChunkedGameMap(
+            engine,
+            width,
+            height,
+            chunks["path"],
+            chunk_size=chunks["chunk_size"],
+            max_chunks=chunks["max_chunks"],
+            scent=scent,
+            noise=noise,
+        )
+    else:
+        visible = np.load(os.path.join(path, "visible.npy"), mmap_mode=mmap_mode)
+        explored = np.load(os.path.join(path, "explored.npy"), mmap_mode=mmap_mode)
+        if info.get("packed_masks"):
+            visible = PackedMask(width, height, visible)
+            explored = PackedMask(width, height, explored)
+        game_map = GameMap(
+            engine,
+            width,
+            height,
+            tiles=np.load(os.path.join(path, "tiles.npy"), mmap_mode=mmap_mode),
+            visible=visible,
+            explored=explored,
+            scent=scent,
+            noise=noise,
+        )
+
+    if entities is None:
+        entities = read_entities(path)
+    for entity in entities:
+        entity.game_map = game_map
+        game_map.add_entity(entity)
+
+    game_map.downstairs_location = info["downstairs_location"]
+    game_map.upstairs_location = info["upstairs_location"]
+    if info.get("layout"):
+        game_map.set_layout(
+            LevelLayout(
+                **{
+                    name: np.load(
+                        os.path.join(path, f"layout_{name}.npy"), mmap_mode=mmap_mode
+                    )
+                    for name in LAYOUT_ARRAYS
+                }
+            )
+        )
+
+    # What is on disk is exactly what was loaded.
+    game_map.dirty = False
+    return game_map
+
+
+def load_frozen_level(path: str) -> FrozenLevel:
+    info = _load_level_info(path)
+    level = FrozenLevel(
+        width=info["width"],
+        height=info["height"],
+        tile_ids=np.load(os.path.join(path, "tile_ids.npy")),
+        explored_bits=np.load(os.path.join(path, "explored_bits.npy")),
+        entities=np.load(os.path.join(path, "entities.npy")),
+        downstairs_location=info["downstairs_location"],
+        upstairs_location=info["upstairs_location"],
+    )
+    if info.get("layout"):
+        with np.load(os.path.join(path, "layout.npz")) as arrays:
+            level.layout = LevelLayout(**{name: arrays[name] for name in LAYOUT_ARRAYS})
+    level.dirty = False
+    return level
+
+
+def save_game(engine: Engine, path: str) -> None:
+    """
+    Save a game to the directory at `path`.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    # Games built around a single map, like chunked ones, have no world.
+    game_world: Optional[GameWorld] = getattr(engine, "game_world", None)
+    current_floor = game_world.current_floor if game_world else 0
+    save_level(engine.game_map, os.path.join(path, f"level_{current_floor}"))
+    if game_world:
+        for floor, level in game_world.levels.items():
+            save_frozen_level(level, os.path.join(path, f"level_{floor}"))
+
+    if engine.journal is not None:
+        engine.journal.save(os.path.join(path, "session.journal"))
+
+    state = {
+        "version": SAVE_VERSION,
+        "seed": engine.journal.seed if engine.journal is not None else 0,
+        "player_id": engine.player.id,
+        "next_entity_id": engine._next_entity_id,
+        # Floors are generated as they are reached, keep replays of the journal exact.
+        "random_state": random.getstate(),
+        "world": game_world and {
+            "map_width": game_world.map_width,
+            "map_height": game_world.map_height,
+            "max_rooms": game_world.max_rooms,
+            "room_min_size": game_world.room_min_size,
+            "room_max_size": game_world.room_max_size,
+            "max_monsters_per_room": game_world.max_monsters_per_room,
+            "current_floor": game_world.current_floor,
+            "packed_masks": game_world.packed_masks,
+            "floors": sorted(game_world.levels),
+        },
+        "messages": [
+            [message.plain_text, message.fg, message.count]
+            for message in engine.message_log.messages
+        ],
+    }
+    with open(os.path.join(path, "engine.json.tmp"), "w") as f:
+        json.dump(state, f)
+    os.replace(
+        os.path.join(path, "engine.json.tmp"), os.path.join(path, "engine.json")
+    )
+
+
+def load_game(path: str, mmap_mode: Optional[str] = None) -> Engine:
+    """
+    Load a game saved with `save_game`.
+    """
+    with open(os.path.join(path, "engine.json")) as f:
+        state = json.load(f)
+    if state["version"] != SAVE_VERSION:
+        raise ValueError(f"Unsupported save version: {state['version']}")
+
+    world = state["world"]
+    current_floor = world["current_floor"] if world else 0
+    level_path = os.path.join(path, f"level_{current_floor}")
+    entities = read_entities(level_path)
+    for player in entities:
+        if isinstance(player, Actor) and player.id == state["player_id"]:
+            break
+    else:
+        raise ValueError(f"{path} has no player.")
+
+    engine = Engine(player=player, seed=state["seed"])
+    # The engine numbers its player, put back the saved numbering.
+    player.id = state["player_id"]
+    engine._next_entity_id = state["next_entity_id"]
+    engine.game_map = load_level(engine, level_path, mmap_mode, entities)
+
+    version, internal_state, gauss_next = state["random_state"]
+    random.setstate((version, tuple(internal_state), gauss_next))
+
+    if world:
+        floors = world.pop("floors")
+        engine.game_world = GameWorld(engine=engine, **world)
+        for floor in floors:
+            engine.game_world.levels[floor] = load_frozen_level(
+                os.path.join(path, f"level_{floor}")
+            )
+
+    journal_path = os.path.join(path, "session.journal")
+    if os.path.exists(journal_path):
+        engine.journal = ActionJournal.load(journal_path)
+    else:
+        engine.journal = ActionJournal(state["seed"], engine.player.id)
+
+    for text, fg, count in state["messages"]:
+        message = Message(text, tuple(fg))
+        message.count = count
+        engine.message_log.messages.append(message)
+
+    if not engine.player.is_alive:
+        engine.event_handler = GameOverEventHandler(engine)
+
+    return engine
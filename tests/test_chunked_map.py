@@ -0,0 +1,22 @@
+import copy
+
+from chunked_map import ChunkedGameMap
+from engine import Engine
+import entity_factories
+from game_map import GameMap
+import tile_types
+
+
+def test_explored_fraction_counts_loaded_and_evicted_chunks(tmp_path):
+    engine = Engine(player=copy.deepcopy(entity_factories.player))
+    # Only two chunks fit in memory, so the third one written is evicted to disk.
+    chunked = ChunkedGameMap(
+        engine, 64, 64, str(tmp_path), chunk_size=16, max_chunks=2
+    )
+    dense = GameMap(engine, 64, 64)
+    for game_map in (chunked, dense):
+        game_map.set_tiles((slice(0, 40), slice(0, 8)), tile_types.floor)
+        game_map.explored[0:20, 0:8] = True
+
+    assert len(chunked.chunks) == 2
+    assert chunked.explored_fraction() == dense.explored_fraction() == 0.5
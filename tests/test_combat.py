@@ -0,0 +1,88 @@
+import copy
+from collections import Counter
+
+import numpy as np
+
+from components.ai import HostileEnemy
+from components.fighter import Fighter
+from engine import Engine
+from entity import Actor
+import entity_factories
+from game_map import GameMap
+import tile_types
+
+
+def fight(batched):
+    """
+    Play out the same attacks, either queued and resolved together or resolved one
+    at a time, and return the engine.
+    """
+    engine = Engine(player=copy.deepcopy(entity_factories.player))
+    engine.game_map = game_map = GameMap(engine, 10, 10)
+    game_map.set_tiles((slice(None), slice(None)), tile_types.floor)
+
+    def spawn(name, x, hp, defense, power):
+        return Actor(
+            name=name,
+            ai_cls=HostileEnemy,
+            fighter=Fighter(hp=hp, defense=defense, power=power),
+        ).spawn(game_map, x, 1)
+
+    brute = spawn("Brute", 1, hp=10, defense=0, power=5)
+    weakling = spawn("Weakling", 2, hp=10, defense=0, power=1)
+    # Three of the brute's hits take the victim from 10 past 0.  The fourth attack
+    # comes after it died.
+    victim = spawn("Victim", 4, hp=10, defense=1, power=1)
+    # Nothing the weakling does gets through its defense.
+    tank = spawn("Tank", 6, hp=10, defense=3, power=1)
+
+    attacks = [
+        (brute, victim),
+        (weakling, tank),
+        (brute, victim),
+        (weakling, tank),
+        (brute, victim),
+        (brute, tank),
+        (brute, victim),
+        (weakling, victim),
+    ]
+    for attacker, target in attacks:
+        engine.combat.add(attacker, target)
+        if not batched:
+            engine.combat.resolve()
+    engine.combat.resolve()
+    return engine
+
+
+def test_resolve_matches_resolving_attacks_one_at_a_time():
+    batched, sequential = fight(batched=True), fight(batched=False)
+
+    def outcome(engine):
+        return sorted(
+            (actor.name, actor.fighter.hp, actor.is_alive)
+            for actor in engine.game_map.entities
+            if isinstance(actor, Actor) and actor is not engine.player
+        )
+
+    def messages(engine):
+        counts = Counter()
+        for message in engine.message_log.messages:
+            counts[message.plain_text] += message.count
+        return counts
+
+    assert outcome(batched) == outcome(sequential) == [
+        ("Brute", 10, True),
+        ("Corpse of Victim", 0, False),
+        ("Tank", 8, True),
+        ("Weakling", 10, True),
+    ]
+    assert messages(batched) == messages(sequential) == {
+        "Brute attacks Victim for 4 hit points!": 3,
+        "Weakling attacks Tank but does no damage.": 2,
+        "Brute attacks Tank for 2 hit points!": 1,
+        "Victim is dead!": 1,
+    }
+    assert batched.game_map.noise.origin == sequential.game_map.noise.origin
+    assert np.array_equal(
+        batched.game_map.noise.values, sequential.game_map.noise.values
+    )
@@ -0,0 +1,57 @@
+import numpy as np
+import tcod
+
+from frame_diff import FRAME, FrameDecoder, FrameEncoder, FrameRecorder, read_frames
+
+
+def drawn_frames():
+    """
+    Yield copies of a console's cells as it is drawn on, resized, and left alone.
+    """
+    console = tcod.console.Console(12, 7, order="F")
+    yield console.tiles_rgb.copy()
+    console.print(0, 0, "@", fg=(255, 255, 255))
+    yield console.tiles_rgb.copy()
+    # Nothing changed.
+    yield console.tiles_rgb.copy()
+    # Runs at both ends of the buffer, and in between.
+    console.print(3, 2, "abc", fg=(10, 20, 30), bg=(40, 50, 60))
+    console.print(11, 6, "z")
+    console.print(0, 0, " ")
+    yield console.tiles_rgb.copy()
+    console.clear(fg=(1, 2, 3), bg=(4, 5, 6))
+    yield console.tiles_rgb.copy()
+    console = tcod.console.Console(9, 4, order="F")
+    console.print(8, 3, "#")
+    yield console.tiles_rgb.copy()
+
+
+def test_decoder_rebuilds_every_frame():
+    encoder, decoder = FrameEncoder(), FrameDecoder()
+    for tiles in drawn_frames():
+        frame = decoder.decode(encoder.encode(tiles))
+        assert frame.shape == tiles.shape
+        assert frame.tobytes() == np.asarray(tiles, dtype=frame.dtype).tobytes()
+
+
+def test_deltas_only_hold_changed_cells():
+    encoder = FrameEncoder()
+    counts = [FRAME.unpack_from(encoder.encode(tiles))[3] for tiles in drawn_frames()]
+    assert counts == [12 * 7, 1, 0, 5, 12 * 7, 9 * 4]
+
+
+def test_recording_plays_back(tmp_path):
+    path = str(tmp_path / "session.frames")
+    recorder = FrameRecorder(path)
+    console = tcod.console.Console(5, 3, order="F")
+    recorder.record(console)
+    recorder.record(console)
+    console.print(2, 1, "x")
+    recorder.record(console)
+    recorder.close()
+
+    decoder = FrameDecoder()
+    frames = [decoder.decode(delta) for _, delta in read_frames(path)]
+    # The frame in which nothing changed is not written.
+    assert len(frames) == 2
+    assert chr(frames[-1]["ch"][2, 1]) == "x"
@@ -0,0 +1,61 @@
+import numpy as np
+
+from packed_mask import PackedMask
+
+# Not a multiple of 8, so the last byte of each column is only partly used.
+WIDTH, HEIGHT = 21, 5
+
+
+def random_mask(rng):
+    return rng.random((WIDTH, HEIGHT)) < 0.5
+
+
+def test_indexes_like_a_bool_array():
+    rng = np.random.default_rng(0)
+    array = random_mask(rng)
+    mask = PackedMask.from_array(array)
+    assert mask.shape == array.shape
+    assert all(mask[x, y] == array[x, y] for x in range(WIDTH) for y in range(HEIGHT))
+    for x1, x2 in [(0, WIDTH), (3, 5), (7, 9), (5, 18), (8, 16), (20, 21), (4, 4)]:
+        region = (slice(x1, x2), slice(1, 4))
+        assert np.array_equal(mask[region], array[region])
+    assert mask.count() == array.sum()
+
+
+def test_writes_leave_the_rest_of_the_edge_bytes_alone():
+    rng = np.random.default_rng(1)
+    array = random_mask(rng)
+    mask = PackedMask.from_array(array)
+    for x1, x2, value in [(3, 13, True), (6, 10, False), (15, 21, False), (0, 2, True)]:
+        region = (slice(x1, x2), slice(1, 3))
+        mask[region] = value
+        array[region] = value
+        assert np.array_equal(mask[:, :], array)
+    for x, y, value in [(0, 0, True), (7, 4, False), (8, 2, True), (20, 3, False)]:
+        mask[x, y] = value
+        array[x, y] = value
+        assert np.array_equal(mask[:, :], array)
+    assert mask.count() == array.sum()
+
+
+def test_or_region_only_sets_tiles_inside_the_region():
+    rng = np.random.default_rng(2)
+    array, other_array = random_mask(rng), random_mask(rng)
+    mask, other = PackedMask.from_array(array), PackedMask.from_array(other_array)
+    for x1, x2 in [(3, 6), (9, 19), (0, WIDTH), (17, 21)]:
+        region = (slice(x1, x2), slice(0, 3))
+        mask.or_region(other, region)
+        array[region] |= other_array[region]
+        assert np.array_equal(mask[:, :], array)
+
+
+def test_whole_masks_combine():
+    rng = np.random.default_rng(3)
+    a, b = random_mask(rng), random_mask(rng)
+    packed_a, packed_b = PackedMask.from_array(a), PackedMask.from_array(b)
+    assert np.array_equal((packed_a | packed_b)[:, :], a | b)
+    assert np.array_equal((packed_a & packed_b)[:, :], a & b)
+    mask = PackedMask.from_array(a)
+    mask |= packed_b
+    mask &= packed_a
+    assert np.array_equal(mask[:, :], (a | b) & a)
@@ -1,4 +1,7 @@
-from typing import Tuple
+import functools
+import json
+import os
+from typing import Any, Dict, Tuple
 
 import numpy as np
 
@@ -23,31 +26,78 @@ tile_dt = np.dtype(
     ]
 )
 
-def new_tile(
-    *, # This enforces use of keywords
-    walkable: int,
-    transparent: int,
-    dark: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
-    light: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
-) -> np.ndarray:
-    """
-    Helper function for defining individual tile types
-    """
-    return np.array((walkable, transparent, dark, light), dtype=tile_dt)
+# Tile types are defined in data/tiles.json, in tile id order.  Only append to it,
+# tile ids are saved.
+TILES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "tiles.json"
+)
 
 # Shroud represents unexplored, unseen tiles.
 shroud = np.array((ord(" "), (255, 255, 255), (0, 0, 0)), dtype=graphic_dt)
 
-floor = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord(" "), (255, 255, 255), (50, 50, 150)),
-    light=(ord(" "), (255, 255, 255), (200, 180, 50)),
-)
 
-wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord(" "), (255, 255, 255), (0, 0, 100)),
-    light=(ord(" "), (255, 255, 255), (130, 110, 50))
-)
\ No newline at end of file
+def _graphic(definition: Dict[str, Any]) -> Tuple[int, Any, Any]:
+    return ord(definition["char"]), tuple(definition["fg"]), tuple(definition["bg"])
+
+
+@functools.lru_cache(maxsize=None)
+def tile_table() -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Compile the tile definitions into a table of every tile type, indexed by tile
+    id, and return it with the id of each tile type by name.
+
+    This is done on first use rather than on import, so the cost of importing this
+    module doesn't grow with the number of tile types.
+    """
+    with open(TILES_PATH) as f:
+        definitions = json.load(f)
+    table = np.array(
+        [
+            (
+                definition["walkable"],
+                definition["transparent"],
+                _graphic(definition["dark"]),
+                _graphic(definition["light"]),
+            )
+            for definition in definitions
+        ],
+        dtype=tile_dt,
+    )
+    return table, {definition["name"]: i for i, definition in enumerate(definitions)}
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Look up `tiles_by_id`, and tile types by name such as `tile_types.floor`.
+    """
+    table, ids = tile_table()
+    if name == "tiles_by_id":
+        return table
+    if name in ids:
+        return table[ids[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def to_ids(tiles: np.ndarray) -> np.ndarray:
+    """
+    Return the id of each tile of a tile array.
+    """
+    table, _ = tile_table()
+    # Compare tiles as raw bytes, and only look up the tile types which appear.
+    raw_dt = np.dtype((np.void, tile_dt.itemsize))
+    ids_by_bytes = {tile.tobytes(): i for i, tile in enumerate(table)}
+    uniques, inverse = np.unique(
+        np.ascontiguousarray(tiles, dtype=tile_dt).view(raw_dt).ravel(),
+        return_inverse=True,
+    )
+    unique_ids = np.array(
+        [ids_by_bytes.get(tile.tobytes(), 0) for tile in uniques], dtype=np.uint8
+    )
+    return np.asfortranarray(unique_ids[inverse].reshape(tiles.shape))
+
+
+def from_ids(ids: np.ndarray) -> np.ndarray:
+    """
+    Return the tile array for an array of tile ids.
+    """
+    return np.asfortranarray(tile_table()[0][ids])